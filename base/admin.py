@@ -1,5 +1,10 @@
 from django.contrib import admin
-from base.models import MatchData
+from base.models import Fixture, InsightCacheEntry, League, MatchData, MatchInsight, Team
 
 # Register your models here.
-admin.site.register(MatchData)
\ No newline at end of file
+admin.site.register(MatchData)
+admin.site.register(League)
+admin.site.register(Team)
+admin.site.register(Fixture)
+admin.site.register(MatchInsight)
+admin.site.register(InsightCacheEntry)
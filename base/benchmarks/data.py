@@ -0,0 +1,76 @@
+"""Synthetic database contents for the view benchmarks.
+
+Matches are parsed from the livescore stand-in's generated pages and
+written through MatchWriter, so every table the views read is filled the
+way a real ingestion fills it.
+"""
+import contextlib
+import json
+import time
+
+from django.db import connection
+
+from base.benchmarks.livescore import Matchday
+from base.models import MatchData
+from base.utils.ingest import MatchWriter
+from base.utils.parsers import parse_league_name, parse_today_matches
+from base.utils.scrape import clean_match, parse_match_pages
+
+
+def synthetic_matches(count, seed):
+    """Matches shaped like the scraper's output, parsed from generated pages."""
+    matchday = Matchday(count, seed=seed)
+    now = int(time.time())
+    matches = []
+    for i, listing in enumerate(parse_today_matches(matchday.homepage)):
+        match_id = listing['match_id']
+        # Half the day is still to kick off, so both feed segments are filled
+        listing['start_time'] = str(now + (i - count // 2) * 300)
+        pages = {
+            'league_name': parse_league_name(matchday.event(match_id)),
+            'last_matches': matchday.last_matches(match_id),
+            'h2h': matchday.h2h(match_id),
+            'standings': matchday.standings(match_id),
+        }
+        match = clean_match(parse_match_pages(listing, pages))
+        if match is not None:
+            matches.append(match)
+    return matches
+
+
+def populate(count, seed=0):
+    """Write `count` synthetic matches, returning a one-line summary."""
+    start = time.perf_counter()
+    writer = MatchWriter()
+    matches = synthetic_matches(count, seed)
+    for offset in range(0, len(matches), 100):
+        writer.write(matches[offset:offset + 100])
+    sizes = [len(json.dumps(data)) for data in MatchData.objects.values_list('data', flat=True)]
+    return (
+        f"🗂️ {writer.created} MatchData rows in {time.perf_counter() - start:.1f}s, "
+        f"{sum(sizes) / max(len(sizes), 1) / 1024:.1f} KiB of JSON each on average"
+    )
+
+
+@contextlib.contextmanager
+def throwaway_database(path=None, options=None):
+    """Run the block on a freshly migrated test database, never the real one.
+
+    SQLite test databases live in memory unless `path` names a file, which
+    benchmarks that write from several threads at once need. `options` are
+    added to the connection OPTIONS for the block, e.g. a longer SQLite
+    busy timeout.
+    """
+    settings_dict = connection.settings_dict
+    old_name = settings_dict['NAME']
+    old_options = settings_dict.get('OPTIONS', {})
+    if path:
+        settings_dict['TEST'] = {**settings_dict.get('TEST', {}), 'NAME': str(path)}
+    if options:
+        settings_dict['OPTIONS'] = {**old_options, **options}
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        settings_dict['OPTIONS'] = old_options
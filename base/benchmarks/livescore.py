@@ -0,0 +1,251 @@
+"""Local stand-in for the livescore.bz pages the scraper downloads.
+
+Serves the homepage listing, event pages and the last_matches_2018,
+h2h_2018 and standings_2020 fragments in the same markup as the saved
+pages in benchmarks/pages, for any number of generated matches. Team
+names come from todays_matches.json, results and tables are generated
+from a fixed seed so every run sees the same pages.
+
+Run it on its own with
+
+    python -m base.benchmarks.livescore --matches 2000 --latency 50 --error-rate 0.01
+
+or let `manage.py bench_scrape` start and stop it.
+"""
+import argparse
+import asyncio
+import collections
+import functools
+import json
+import random
+from pathlib import Path
+
+from aiohttp import web
+
+
+SEED_FILE = Path(__file__).resolve().parents[2] / 'todays_matches.json'
+LEAGUE_SIZE = 20  # teams per generated league
+LAST_MATCHES = 10
+H2H_MEETINGS = 5
+FIRST_MATCH_ID = 9000000
+FIRST_KICKOFF = 1761238800
+
+NAV = ''.join(
+    f'<li class="nav-item"><a href="/en/football/{country}/">{country.title()}</a></li>\n'
+    for country in ['england', 'spain', 'germany', 'italy', 'france', 'portugal', 'netherlands', 'turkey', 'scotland', 'belgium'] * 4
+)
+PAGE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Livescore</title>
+<link rel="stylesheet" href="/css/style.css">
+</head>
+<body>
+<ul class="nav">
+{nav}</ul>
+{body}
+</body>
+</html>
+'''
+
+
+def seed_team_names(path=SEED_FILE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            fixtures = json.load(f)
+        names = [fixture[side]['name'] for fixture in fixtures for side in ('home', 'away')]
+    except (OSError, ValueError, KeyError, TypeError):
+        names = []
+    return list(dict.fromkeys(names)) or ['Home FC', 'Away FC']
+
+
+def result_row(row_class, date, home, score, away, half_score, index):
+    return (
+        f'<tr class="{row_class}" onclick="openMatch({index})">\n'
+        f'  <td class="sm_date">{date}</td>\n'
+        f'  <td class="sm_t1"><span class="tn">{home}</span></td>\n'
+        f'  <td class="sm_sc"><b>{score[0]} - {score[1]}</b></td>\n'
+        f'  <td class="sm_t2"><span class="tn">{away}</span></td>\n'
+        f'  <td class="sm_hs">{half_score[0]}-{half_score[1]}</td>\n'
+        f'</tr>\n'
+    )
+
+
+def random_result(rng):
+    score = (rng.randint(0, 4), rng.randint(0, 3))
+    half_score = (rng.randint(0, score[0]), rng.randint(0, score[1]))
+    date = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(20, 25)}"
+    return date, score, half_score
+
+
+# ======================================================
+# GENERATED MATCHDAY
+# ======================================================
+class Matchday:
+    """`count` matches between generated teams, LEAGUE_SIZE teams a league."""
+
+    def __init__(self, count, names=None, seed=0):
+        names = names or seed_team_names()
+        self.seed = seed
+        # Past the seed names, teams are numbered: "Germany 2", "Germany 3"...
+        self.teams = [
+            names[i % len(names)] + (f" {i // len(names) + 1}" if i >= len(names) else '')
+            for i in range(2 * count)
+        ]
+        self.matches = {
+            str(FIRST_MATCH_ID + i): (2 * i, 2 * i + 1)
+            for i in range(count)
+        }
+
+    def league_of(self, team):
+        return team // LEAGUE_SIZE
+
+    def league_teams(self, league):
+        return range(league * LEAGUE_SIZE, min(len(self.teams), (league + 1) * LEAGUE_SIZE))
+
+    def rng(self, *key):
+        return random.Random(':'.join(map(str, (self.seed,) + key)))
+
+    @functools.cached_property
+    def homepage(self):
+        rows = ''.join(
+            f'<a class="m {"meven" if i % 2 == 0 else "modd"}" mid="{match_id}" '
+            f'start-time="{FIRST_KICKOFF + (i % 48) * 900}" href="/en/football/event/{match_id}/">'
+            f'<st>18:00</st><t1>{self.teams[home]}</t1><sc>-</sc><t2>{self.teams[away]}</t2></a>\n'
+            for i, (match_id, (home, away)) in enumerate(self.matches.items())
+        )
+        return PAGE.format(nav=NAV, body=f'<div class="matches">\n{rows}</div>')
+
+    @functools.lru_cache(maxsize=None)
+    def event(self, match_id):
+        home, away = self.matches[match_id]
+        body = (
+            f'<div class="detayHeader aic">Benchmark League {self.league_of(home) + 1}</div>\n'
+            f'<div class="event"><t1>{self.teams[home]}</t1><t2>{self.teams[away]}</t2></div>'
+        )
+        return PAGE.format(nav=NAV, body=body)
+
+    def last_matches_table(self, css_class, team):
+        rng = self.rng('last', team)
+        opponents = [t for t in self.league_teams(self.league_of(team)) if t != team]
+        rows = []
+        for index in range(LAST_MATCHES):
+            date, score, half_score = random_result(rng)
+            opponent = self.teams[rng.choice(opponents)] if opponents else 'Opponent'
+            home, away = (self.teams[team], opponent) if rng.random() < 0.5 else (opponent, self.teams[team])
+            outcome = 'W' if score[0] > score[1] else 'L' if score[0] < score[1] else 'D'
+            rows.append(result_row(f"sm_m sm_snc{outcome}", date, home, score, away, half_score, index))
+        return (
+            f'<div class="{css_class} lm_block">\n<table class="lm_table">\n'
+            f'<thead><tr><th class="lm_h1" colspan="5"><span> {self.teams[team]}</span> '
+            f'<span class="lm_sub">Last matches</span></th></tr></thead>\n'
+            f'<tbody>\n{"".join(rows)}</tbody>\n</table>\n</div>\n'
+        )
+
+    @functools.lru_cache(maxsize=None)
+    def last_matches(self, match_id):
+        home, away = self.matches[match_id]
+        return (
+            '<div class="lm_wrap">\n'
+            + self.last_matches_table('lm_home', home)
+            + self.last_matches_table('lm_away', away)
+            + '</div>\n'
+        )
+
+    @functools.lru_cache(maxsize=None)
+    def h2h(self, match_id):
+        home, away = self.matches[match_id]
+        rng = self.rng('h2h', match_id)
+        rows = []
+        for index in range(H2H_MEETINGS):
+            date, score, half_score = random_result(rng)
+            teams = (self.teams[home], self.teams[away]) if index % 2 else (self.teams[away], self.teams[home])
+            rows.append(result_row("sm_m", date, teams[0], score, teams[1], half_score, index))
+        return f'<div class="h2h_wrap">\n<table class="h2h_table">\n<tbody>\n{"".join(rows)}</tbody>\n</table>\n</div>\n'
+
+    @functools.lru_cache(maxsize=None)
+    def standings(self, match_id):
+        league = self.league_of(self.matches[match_id][0])
+        rng = self.rng('table', league)
+        rows = []
+        for team in self.league_teams(league):
+            won, drawn, lost = rng.randint(0, 20), rng.randint(0, 10), rng.randint(0, 15)
+            rows.append({
+                'd': drawn, 'l': lost, 'w': won,
+                'ga': rng.randint(10, 60), 'gf': rng.randint(10, 70),
+                'po': 3 * won + drawn, 'prom': None, 'team': self.teams[team], 'selected': 0,
+            })
+        rows.sort(key=lambda row: -row['po'])
+        for pos, row in enumerate(rows, start=1):
+            row['pos'] = pos
+        stdata = {'overall': {'tables': [{'name': f"Benchmark League {league + 1}", 'data': rows}]}}
+        return f'<script>\nvar stdata = {json.dumps(stdata)};\nfunction renderStandings() {{}}\n</script>\n'
+
+
+# ======================================================
+# SERVER
+# ======================================================
+def make_app(matchday, latency=0.0, error_rate=0.0, seed=0):
+    """aiohttp app serving `matchday`. Latency is in seconds, each response
+    waits between half and one and a half times it."""
+    rng = random.Random(seed)
+    stats = collections.Counter()
+
+    async def respond(request, render):
+        stats['requests'] += 1
+        if latency:
+            await asyncio.sleep(latency * (0.5 + rng.random()))
+        if rng.random() < error_rate:
+            stats['errors'] += 1
+            return web.Response(status=rng.choice((429, 503)), headers={'Retry-After': '0'})
+        try:
+            text = render()
+        except KeyError:
+            stats['not_found'] += 1
+            return web.Response(status=404)
+        stats['bytes'] += len(text)
+        return web.Response(text=text, content_type='text/html')
+
+    async def homepage(request):
+        return await respond(request, lambda: matchday.homepage)
+
+    async def event(request):
+        return await respond(request, lambda: matchday.event(request.match_info['match_id']))
+
+    def fragment(page):
+        async def handler(request):
+            return await respond(request, lambda: page(request.query.get('id', '')))
+        return handler
+
+    async def stats_view(request):
+        return web.json_response(dict(stats))
+
+    app = web.Application()
+    app.router.add_get('/en/', homepage)
+    app.router.add_get('/en/football/event/{match_id}/', event)
+    app.router.add_get('/last_matches_2018.cache', fragment(matchday.last_matches))
+    app.router.add_get('/h2h_2018.cache', fragment(matchday.h2h))
+    app.router.add_get('/standings_2020.cache', fragment(matchday.standings))
+    app.router.add_get('/_stats', stats_view)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--matches', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0, help='Mean response delay in ms')
+    parser.add_argument('--error-rate', type=float, default=0, help='Share of responses that are 429/503')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--seed-file', default=str(SEED_FILE), help='todays_matches.json to take team names from')
+    args = parser.parse_args()
+
+    matchday = Matchday(args.matches, seed_team_names(args.seed_file), seed=args.seed)
+    app = make_app(matchday, latency=args.latency / 1000, error_rate=args.error_rate, seed=args.seed)
+    web.run_app(app, host=args.host, port=args.port, print=lambda message: print(message, flush=True))
+
+
+if __name__ == '__main__':
+    main()
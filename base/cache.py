@@ -0,0 +1,84 @@
+import functools
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+
+
+GENERATION_KEY = 'winkick:ingestion-generation'
+
+
+# ======================================================
+# INGESTION GENERATION
+# ======================================================
+def ingestion_generation():
+    """Return the number of the current ingestion, part of every page key."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # The counter was evicted or the cache flushed: start from a number
+        # no earlier generation can have used
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_ingestion_generation():
+    # Every cached page keyed on the old number becomes unreachable at once
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+# ======================================================
+# PAGE CACHE
+# ======================================================
+def cached_page(request, view):
+    """Return (key, cached response) for a request, key is None if it can't be cached."""
+    if request.method != 'GET' or len(messages.get_messages(request)):
+        return None, None
+    key = f"winkick:page:{ingestion_generation()}:{view.__name__}:{request.get_full_path()}"
+    return key, cache.get(key)
+
+
+def store_page(key, response, timeout):
+    if key and response.status_code == 200 and 'no-store' not in response.get('Cache-Control', ''):
+        cache.set(key, response, timeout or settings.PAGE_CACHE_TIMEOUT)
+
+
+def cache_per_ingestion(timeout=None):
+    """Cache a view's successful GET responses until the next ingestion.
+
+    `timeout` bounds how long a page lives within one generation, for
+    pages that also depend on the clock. Responses marked no-store and
+    requests with pending flash messages are never cached. Works on sync
+    and async views, async ones reach the cache (and the session the
+    messages may live in) from a worker thread.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                key, response = await sync_to_async(cached_page)(request, view)
+                if response is not None:
+                    return response
+
+                response = await view(request, *args, **kwargs)
+                if key:
+                    await sync_to_async(store_page)(key, response, timeout)
+                return response
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key, response = cached_page(request, view)
+            if response is not None:
+                return response
+
+            response = view(request, *args, **kwargs)
+            store_page(key, response, timeout)
+            return response
+        return wrapper
+    return decorator
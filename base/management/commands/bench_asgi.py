@@ -0,0 +1,259 @@
+import asyncio
+import collections
+import io
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import close_old_connections
+from django.test import override_settings
+from django.urls import reverse
+
+from base.benchmarks.data import populate, throwaway_database
+from base.models import InsightLease, MatchData, MatchInsight
+from base.tasks import claim, pending_key, save_insight
+from base.utils.telemetry import percentile
+
+
+STUB_INSIGHT = 'Benchmark insight: both sides are in decent form, expect a close match.'
+PAGE_VIEWS = ['last_matches', 'h2h', 'standings']
+
+
+
+# ======================================================
+# MINIMAL SERVERS
+# ======================================================
+# The requests go through the same handlers winkick.wsgi and winkick.asgi
+# expose, called the way a server would call them, minus the sockets.
+
+def split_path(path):
+    path_info, _, query = path.partition('?')
+    return path_info, query
+
+
+def wsgi_get(application, path):
+    path_info, query = split_path(path)
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path_info, 'QUERY_STRING': query,
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'HTTP_HOST': 'testserver',
+        'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    started = []
+    result = application(environ, lambda status, headers, exc_info=None: started.append(status))
+    try:
+        body = b''.join(result)
+    finally:
+        # Sends request_finished, which closes the thread's connection
+        result.close()
+    return int(started[0].split()[0]), body
+
+
+async def asgi_get(application, path):
+    path_info, query = split_path(path)
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path_info, 'raw_path': path_info.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': [(b'host', b'testserver')], 'server': ('testserver', 80),
+        'client': ('127.0.0.1', 50000),
+    }
+    request = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    disconnect = asyncio.Event()
+
+    async def receive():
+        if request:
+            return request.pop()
+        # The client stays connected until the response is sent
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    status = next(message['status'] for message in messages if message['type'] == 'http.response.start')
+    return status, b''.join(message.get('body', b'') for message in messages if message['type'] == 'http.response.body')
+
+
+# ======================================================
+# STUBS
+# ======================================================
+class SlowWorker:
+    """Stands in for the django-q cluster and a Gemini call of `latency` seconds.
+
+    Runs on its own thread like the real cluster runs in its own process,
+    insights are stored (and their pending marker dropped) in queue order.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def enqueue(self, match_id):
+        if not claim(pending_key(match_id), settings.INSIGHT_PENDING_TIMEOUT):
+            return False
+        self.jobs.put((time.monotonic() + self.latency, match_id))
+        return True
+
+    def work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            due, match_id = job
+            time.sleep(max(0, due - time.monotonic()))
+            save_insight(MatchData.objects.only('match_id', 'insight_fingerprint').get(match_id=match_id), STUB_INSIGHT)
+        close_old_connections()
+
+    def stop(self):
+        self.jobs.put(None)
+        self.thread.join()
+
+
+class ThreadSampler:
+    """Records the highest number of live threads while it runs."""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self.running = True
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    def sample(self):
+        while self.running:
+            self.peak = max(self.peak, threading.active_count())
+            time.sleep(0.005)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.running = False
+        self.thread.join()
+
+
+class Command(BaseCommand):
+    help = 'Compare a threaded WSGI deployment with ASGI under many slow AI insight requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--matches', type=int, default=200, help='Synthetic MatchData rows to create')
+        parser.add_argument('--insight-requests', type=int, default=100,
+                            help='AI tab visits of matches whose insight is still being generated')
+        parser.add_argument('--page-requests', type=int, default=200, help='Visits of the other match tabs')
+        parser.add_argument('--llm-latency', type=float, default=1000, help='Stubbed Gemini round-trip in ms')
+        parser.add_argument('--wait', type=float, default=3, help='INSIGHT_WAIT_SECONDS for the run')
+        parser.add_argument('--threads', type=int, default=8, help='Worker threads of the WSGI deployment')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with ExitStack() as stack:
+            tmp = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+            stack.enter_context(override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                INSIGHT_WAIT_SECONDS=options['wait'],
+                # Every waiting request would be logged as slow
+                REQUEST_TIMING={**getattr(settings, 'REQUEST_TIMING', {}), 'SLOW_REQUEST_MS': float('inf')},
+            ))
+            # Both deployments write from several threads, SQLite needs a file
+            # for that, and a busy timeout that outlasts a burst of writers
+            stack.enter_context(throwaway_database(tmp / 'bench_asgi.sqlite3', options={'timeout': 30}))
+            self.stdout.write(populate(options['matches'], options['seed']))
+
+            rng = random.Random(options['seed'])
+            match_ids = list(MatchData.objects.values_list('match_id', flat=True))
+            requests = [
+                ('insight', reverse('base:ai_insight', args=[match_id]))
+                for match_id in rng.sample(match_ids, min(options['insight_requests'], len(match_ids)))
+            ] + [
+                ('page', reverse(f'base:{rng.choice(PAGE_VIEWS)}', args=[rng.choice(match_ids)]))
+                for _ in range(options['page_requests'])
+            ]
+            rng.shuffle(requests)
+
+            results = {}
+            for name, run in (('wsgi', self.run_wsgi), ('asgi', self.run_asgi)):
+                MatchInsight.objects.all().delete()
+                InsightLease.objects.all().delete()
+                cache.clear()
+                worker = SlowWorker(options['llm_latency'] / 1000)
+                with mock.patch('base.views.enqueue_insight', worker.enqueue), ThreadSampler() as threads:
+                    start = time.perf_counter()
+                    samples = run(requests, options)
+                    wall = time.perf_counter() - start
+                worker.stop()
+                results[name] = (samples, wall, threads.peak)
+
+        self.report(results, options)
+
+    def run_wsgi(self, requests, options):
+        """A threaded WSGI server: `--threads` requests at a time, the rest wait in the backlog."""
+        application = get_wsgi_application()
+        start = time.perf_counter()
+
+        def serve(kind, path):
+            status, body = wsgi_get(application, path)
+            return kind, time.perf_counter() - start, status, body
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            return [future.result() for future in [executor.submit(serve, *request) for request in requests]]
+
+    def run_asgi(self, requests, options):
+        """An ASGI server: one event loop holding every request at once."""
+        application = get_asgi_application()
+
+        async def run():
+            start = time.perf_counter()
+
+            async def serve(kind, path):
+                status, body = await asgi_get(application, path)
+                return kind, time.perf_counter() - start, status, body
+
+            return await asyncio.gather(*(serve(*request) for request in requests))
+        return asyncio.run(run())
+
+    def report(self, results, options):
+        self.stdout.write(
+            f"{options['insight_requests']} AI tab and {options['page_requests']} other requests at once, "
+            f"{options['llm_latency']:g} ms LLM, {options['wait']:g}s insight wait, {options['threads']} WSGI threads"
+        )
+        self.stdout.write(
+            f"{'deployment':<12}{'wall s':>8}{'req/s':>8}{'peak threads':>14}"
+            f"{'page p50':>10}{'page p95':>10}{'AI p50':>9}{'AI p95':>9}{'AI ready':>10}"
+        )
+        for name, (samples, wall, threads) in results.items():
+            latencies = collections.defaultdict(list)
+            ready = 0
+            for kind, elapsed, status, body in samples:
+                if status != 200:
+                    raise CommandError(f"{name} returned {status}")
+                latencies[kind].append(elapsed * 1000)
+                if kind == 'insight' and STUB_INSIGHT.encode() in body:
+                    ready += 1
+            for values in latencies.values():
+                values.sort()
+            self.stdout.write(
+                f"{name:<12}{wall:>8.2f}{len(samples) / wall:>8.1f}{threads:>14}"
+                f"{percentile(latencies['page'], 0.50):>10.0f}{percentile(latencies['page'], 0.95):>10.0f}"
+                f"{percentile(latencies['insight'], 0.50):>9.0f}{percentile(latencies['insight'], 0.95):>9.0f}"
+                f"{ready:>6} / {len(latencies['insight'])}"
+            )
+        self.stdout.write("Latencies are in ms from the moment all requests arrive, queueing included.")
+        self.stdout.write("Under ASGI every request in flight keeps an idle thread for its ORM calls.")
@@ -0,0 +1,123 @@
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand
+
+from base.utils.parsers import (
+    parse_head_to_head,
+    parse_last_matches,
+    parse_league_name,
+    parse_today_matches,
+)
+
+PAGES_DIR = Path(__file__).resolve().parents[2] / 'benchmarks' / 'pages'
+
+
+# ======================================================
+# REFERENCE: the html.parser implementation we replaced
+# ======================================================
+def bs4_result_rows(rows):
+    matches = []
+    for row in rows:
+        cols = row.find_all("td")
+        if len(cols) < 5:
+            continue
+        matches.append({
+            "date": cols[0].text.strip(),
+            "home": cols[1].text.strip(),
+            "score": cols[2].text.strip(),
+            "away": cols[3].text.strip(),
+            "half_score": cols[4].text.strip(),
+        })
+    return matches
+
+
+def bs4_today_matches(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return [{
+        "match_id": tag.get("mid"),
+        "team": {"home": tag.find("t1").get_text(strip=True), "away": tag.find("t2").get_text(strip=True)},
+        "start_time": tag.get("start-time"),
+    } for tag in soup.find_all("a", class_=["m meven", "m modd"])]
+
+
+def bs4_league_name(html):
+    soup = BeautifulSoup(html, "html.parser")
+    header = soup.find("div", class_="detayHeader aic")
+    return header.text.strip() if header else "Unknown League"
+
+
+def bs4_team_last_matches(html, match_id, class_name):
+    soup = BeautifulSoup(html, "html.parser")
+    find_element = soup.find("div", class_=class_name)
+    if not find_element:
+        return {}
+    rows = find_element.find_all("tr", class_=["sm_m sm_sncL", "sm_m sm_sncW", "sm_m sm_sncD"])
+    return {
+        "match_id": match_id,
+        "team_name": find_element.find("th", class_="lm_h1").find_all("span")[0].text,
+        "matches": bs4_result_rows(rows),
+    }
+
+
+def bs4_last_matches(html, match_id):
+    # One full parse per side, like process_match used to do
+    return (
+        bs4_team_last_matches(html, match_id, "lm_home"),
+        bs4_team_last_matches(html, match_id, "lm_away"),
+    )
+
+
+def bs4_head_to_head(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return bs4_result_rows(soup.find_all("tr", class_="sm_m"))
+
+
+CASES = [
+    ('homepage', 'homepage.html', bs4_today_matches, parse_today_matches),
+    ('event', 'event.html', bs4_league_name, parse_league_name),
+    ('last_matches', 'last_matches.html', lambda html: bs4_last_matches(html, '1'), lambda html: parse_last_matches(html, '1')),
+    ('h2h', 'h2h.html', bs4_head_to_head, parse_head_to_head),
+]
+
+
+def best_of(func, html, iterations, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func(html)
+        timings.append((time.perf_counter() - start) / iterations)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = 'Compare html.parser and lxml parse times on saved livescore pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--pages-dir', default=str(PAGES_DIR), help='Directory with saved HTML pages')
+
+    def handle(self, *args, **options):
+        pages_dir = Path(options['pages_dir'])
+        iterations = options['iterations']
+
+        self.stdout.write(f"{'page':<14}{'KiB':>7}{'bs4 ms':>10}{'lxml ms':>10}{'speedup':>9}")
+        for name, filename, old, new in CASES:
+            path = pages_dir / filename
+            if not path.exists():
+                self.stdout.write(self.style.WARNING(f"{name:<14}missing {path}"))
+                continue
+            html = path.read_text(encoding='utf-8')
+
+            if old(html) != new(html):
+                self.stdout.write(self.style.ERROR(f"{name:<14}parsers disagree on {path}"))
+                continue
+
+            old_time = best_of(old, html, iterations)
+            new_time = best_of(new, html, iterations)
+            self.stdout.write(
+                f"{name:<14}{len(html) / 1024:>7.1f}{old_time * 1000:>10.3f}"
+                f"{new_time * 1000:>10.3f}{old_time / new_time:>8.1f}x"
+            )
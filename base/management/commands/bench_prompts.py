@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from base.models import MatchData
+from base.utils.prompts import estimate_tokens, match_summary
+
+
+class Command(BaseCommand):
+    help = 'Compare estimated prompt tokens of raw match data and the compact summary'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Only look at this many matches')
+        parser.add_argument('--show', action='store_true', help='Print each summary')
+
+    def handle(self, *args, **options):
+        rows = MatchData.objects.select_related('league').order_by('id')[:options['limit']]
+
+        raw_total = summary_total = count = 0
+        largest = 0
+        for row in rows:
+            match = {**row.data, 'team_standings': row.get_standings()}
+            summary = match_summary(match)
+            raw_tokens = estimate_tokens(repr(match))
+            summary_tokens = estimate_tokens(summary)
+
+            raw_total += raw_tokens
+            summary_total += summary_tokens
+            largest = max(largest, raw_tokens)
+            count += 1
+            if options['show']:
+                self.stdout.write(f"{row.match_id}: ~{raw_tokens} -> ~{summary_tokens} tokens\n{summary}\n")
+
+        if not count:
+            self.stdout.write(self.style.WARNING("No matches in the database"))
+            return
+
+        self.stdout.write(f"{'':<10}{'raw':>10}{'summary':>10}")
+        self.stdout.write(f"{'mean':<10}{raw_total / count:>10.0f}{summary_total / count:>10.0f}")
+        self.stdout.write(f"{'max raw':<10}{largest:>10}")
+        self.stdout.write(
+            f"{count} matches, ~{raw_total} match data tokens before, ~{summary_total} after "
+            f"({1 - summary_total / raw_total:.0%} fewer)"
+        )
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import resource
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from base.utils import scrape
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError("The livescore stand-in exited before it was ready")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f"The livescore stand-in didn't open port {port} in {timeout}s")
+
+
+def peak_rss_mib():
+    try:
+        with open('/proc/self/status') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('VmHWM:')) / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = 'Run get_clean_todays_matches_data against a local livescore stand-in and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--matches', type=int, default=500)
+        parser.add_argument('--latency', type=float, default=20, help='Mean server response delay in ms')
+        parser.add_argument('--error-rate', type=float, default=0, help='Share of responses that are 429/503')
+        parser.add_argument('--rps', type=float, default=None, help='Override SCRAPER REQUESTS_PER_SECOND (and BURST)')
+        parser.add_argument('--concurrency', type=int, default=None, help='Override SCRAPER MAX_CONCURRENCY_PER_HOST')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        port = free_port()
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'base.benchmarks.livescore', '--port', str(port),
+                '--matches', str(options['matches']), '--latency', str(options['latency']),
+                '--error-rate', str(options['error_rate']), '--seed', str(options['seed']),
+            ],
+            cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(port, server)
+            self.report(self.run(f"http://127.0.0.1:{port}", options), port, options)
+        finally:
+            server.terminate()
+            server.wait()
+
+    def run(self, base_url, options):
+        overrides = {'BASE_URL': base_url, 'HTTP_CACHE_DIR': None, 'BACKOFF_BASE': 0.05, 'BACKOFF_MAX': 1}
+        if options['rps']:
+            overrides.update({'REQUESTS_PER_SECOND': options['rps'], 'BURST': options['rps']})
+        if options['concurrency']:
+            overrides['MAX_CONCURRENCY_PER_HOST'] = options['concurrency']
+
+        # Parsing runs on executor threads, time it with each thread's own clock
+        parse_times = []
+        parse_clean_match = scrape.parse_clean_match
+
+        def timed_parse(match, pages, tables=None):
+            start = time.thread_time()
+            try:
+                return parse_clean_match(match, pages, tables)
+            finally:
+                parse_times.append(time.thread_time() - start)
+
+        scrape.parse_clean_match = timed_parse
+        try:
+            with override_settings(SCRAPER={**settings.SCRAPER, **overrides}):
+                rss_before = peak_rss_mib()
+                cpu_start = time.process_time()
+                start = time.perf_counter()
+                matches = asyncio.run(scrape.get_clean_todays_matches_data())
+                wall = time.perf_counter() - start
+                cpu = time.process_time() - cpu_start
+        finally:
+            scrape.parse_clean_match = parse_clean_match
+
+        return {
+            'ingested': len(matches),
+            'wall': wall,
+            'cpu': cpu,
+            'parse_cpu': sum(parse_times),
+            'parsed': len(parse_times),
+            'rss_before': rss_before,
+            'rss_peak': peak_rss_mib(),
+        }
+
+    def report(self, result, port, options):
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stats") as response:
+            server = json.load(response)
+
+        requests = server.get('requests', 0)
+        self.stdout.write(
+            f"{options['matches']} matches, {options['latency']:g} ms latency, "
+            f"{options['error_rate']:.1%} errors, limits: {options['rps'] or settings.SCRAPER.get('REQUESTS_PER_SECOND')} req/s, "
+            f"{options['concurrency'] or settings.SCRAPER.get('MAX_CONCURRENCY_PER_HOST')} in flight"
+        )
+        rows = [
+            ('ingested', f"{result['ingested']} / {options['matches']}"),
+            ('wall time', f"{result['wall']:.2f} s"),
+            ('requests', f"{requests} ({server.get('errors', 0)} errors served)"),
+            ('requests/s', f"{requests / result['wall']:.1f}"),
+            ('downloaded', f"{server.get('bytes', 0) / 2 ** 20:.1f} MiB"),
+            ('process CPU', f"{result['cpu']:.2f} s"),
+            ('parse CPU', f"{result['parse_cpu']:.2f} s ({result['parse_cpu'] / max(result['parsed'], 1) * 1000:.2f} ms/match)"),
+            ('peak RSS', f"{result['rss_peak']:.1f} MiB ({result['rss_peak'] - result['rss_before']:+.1f} during the run)"),
+        ]
+        for name, value in rows:
+            self.stdout.write(f"{name:<14}{value}")
+        if result['ingested'] < options['matches']:
+            self.stdout.write(self.style.WARNING(f"{options['matches'] - result['ingested']} matches were dropped"))
@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+# Each case runs in a fresh interpreter, so module caches from this process
+# don't hide the cost being measured
+CHILD = '''
+import json, resource, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+{code}
+elapsed = time.perf_counter() - start
+try:
+    # ru_maxrss survives exec, so it would report the parent's peak on Linux
+    with open("/proc/self/status") as f:
+        peak_kib = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+except OSError:
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mib": peak_kib / 1024,
+    "modules": len(sys.modules),
+    "heavy": sorted(name for name in {heavy!r} if name in sys.modules),
+}}))
+'''
+
+HEAVY_MODULES = ('aiohttp', 'bs4', 'google.genai', 'lxml.html', 'ollama')
+
+CASES = [
+    ('django.setup', ''),
+    ('web worker', 'import winkick.urls'),
+    ('scraper', 'import base.utils.scrape'),
+    ('gemini client', 'from base.utils.ai import get_client; get_client()'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Measure import time, peak RSS and heavy modules loaded at process start'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per case, the fastest is reported')
+
+    def run_case(self, code):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'winkick.settings')}
+        result = subprocess.run(
+            [sys.executable, '-c', CHILD.format(code=code, heavy=HEAVY_MODULES)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            return None, result.stderr.strip().splitlines()[-1]
+        return json.loads(result.stdout.strip().splitlines()[-1]), None
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'case':<18}{'ms':>8}{'RSS MiB':>10}{'modules':>9}  heavy modules")
+        for name, code in CASES:
+            runs = []
+            for _ in range(options['repeat']):
+                run, error = self.run_case(code)
+                if error:
+                    self.stdout.write(self.style.ERROR(f"{name:<18}{error}"))
+                    break
+                runs.append(run)
+            if not runs:
+                continue
+
+            best = min(runs, key=lambda run: run['seconds'])
+            self.stdout.write(
+                f"{name:<18}{best['seconds'] * 1000:>8.0f}{best['rss_mib']:>10.1f}"
+                f"{best['modules']:>9}  {', '.join(best['heavy']) or '-'}"
+            )
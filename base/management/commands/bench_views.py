@@ -0,0 +1,155 @@
+import random
+import re
+import time
+from contextlib import ExitStack
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template.backends.django import Template
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from base.benchmarks.data import populate, throwaway_database
+from base.models import MatchData
+from base.tasks import save_insight
+from base.utils.telemetry import percentile
+
+
+CACHE_BACKENDS = {
+    'none': 'django.core.cache.backends.dummy.DummyCache',
+    'warm': 'django.core.cache.backends.locmem.LocMemCache',
+}
+VIEWS = ['feed', 'last_matches', 'h2h', 'standings', 'ai_insight']
+STUB_INSIGHT = 'Benchmark insight: both sides are in decent form, expect a close match.'
+
+
+class StubWorker:
+    """Stands in for the django-q cluster and the LLM.
+
+    Queued insights are written with a canned text between two requests,
+    so the pending page is measured on the first visit of a match and the
+    finished one afterwards, without the stub's queries in the numbers.
+    """
+
+    def __init__(self):
+        self.queued = []
+
+    def enqueue(self, match_id):
+        self.queued.append(match_id)
+        return True
+
+    def run(self):
+        for match_id in self.queued:
+            save_insight(MatchData.objects.only('match_id', 'insight_fingerprint').get(match_id=match_id), STUB_INSIGHT)
+        self.queued.clear()
+
+
+class Command(BaseCommand):
+    help = 'Load-test the match views on a throwaway database and report latency, SQL queries and template time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--matches', type=int, default=500, help='Synthetic MatchData rows to create')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per view')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per view')
+        parser.add_argument('--cache', choices=sorted(CACHE_BACKENDS), default='none',
+                            help="'none' renders every request, 'warm' keeps the page cache on")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--max-p95', type=float, default=None, help='Fail if any view is slower than this at p95 (ms)')
+        parser.add_argument('--max-queries', type=int, default=None, help='Fail if any request runs more SQL queries')
+
+    def handle(self, *args, **options):
+        caches = {'default': {'BACKEND': CACHE_BACKENDS[options['cache']]}}
+
+        with ExitStack() as stack:
+            stack.enter_context(override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], CACHES=caches,
+            ))
+            stack.enter_context(throwaway_database())
+            self.worker = StubWorker()
+            stack.enter_context(mock.patch('base.views.enqueue_insight', self.worker.enqueue))
+
+            self.stdout.write(populate(options['matches'], options['seed']))
+            results = self.run(options)
+
+        self.report(results, options)
+
+    def paths(self, view, count, rng):
+        if view == 'feed':
+            return [rng.choice(self.feed_pages) for _ in range(count)]
+        return [reverse(f'base:{view}', args=[rng.choice(self.match_ids)]) for _ in range(count)]
+
+    def run(self, options):
+        client = Client()
+        rng = random.Random(options['seed'])
+        self.match_ids = list(MatchData.objects.values_list('match_id', flat=True))
+
+        # Follow the feed's "more matches" links once to know every page
+        self.feed_pages = [reverse('base:feed')]
+        while True:
+            found = re.search(r'href="(\?after=[^"]+)"', client.get(self.feed_pages[-1]).text)
+            if not found:
+                break
+            self.feed_pages.append(reverse('base:feed') + found.group(1))
+        cache.clear()
+
+        template_times = []
+        original_render = Template.render
+
+        def timed_render(template, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original_render(template, *args, **kwargs)
+            finally:
+                template_times.append(time.perf_counter() - start)
+
+        results = {}
+        with mock.patch.object(Template, 'render', timed_render):
+            for view in VIEWS:
+                for path in self.paths(view, options['warmup'], rng):
+                    client.get(path)
+                    self.worker.run()
+
+                samples = []
+                for path in self.paths(view, options['requests'], rng):
+                    template_times.clear()
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        response = client.get(path)
+                        elapsed = time.perf_counter() - start
+                    self.worker.run()
+                    if response.status_code != 200:
+                        raise CommandError(f"{path} returned {response.status_code}")
+                    samples.append((elapsed, len(queries), sum(template_times)))
+                results[view] = samples
+        return results
+
+    def report(self, results, options):
+        self.stdout.write(
+            f"{options['requests']} requests per view, page cache: {options['cache']}, "
+            f"{len(self.feed_pages)} feed pages"
+        )
+        self.stdout.write(
+            f"{'view':<14}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'queries':>9}{'max':>5}{'template ms':>13}"
+        )
+        failures = []
+        for view, samples in results.items():
+            latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+            queries = [count for _, count, _ in samples]
+            template_ms = sum(rendered for _, _, rendered in samples) * 1000 / len(samples)
+            p95 = percentile(latencies, 0.95)
+            self.stdout.write(
+                f"{view:<14}{percentile(latencies, 0.50):>9.2f}{p95:>9.2f}{percentile(latencies, 0.99):>9.2f}"
+                f"{sum(queries) / len(queries):>9.1f}{max(queries):>5}{template_ms:>13.2f}"
+            )
+            if options['max_p95'] is not None and p95 > options['max_p95']:
+                failures.append(f"{view} p95 {p95:.1f} ms > {options['max_p95']:g} ms")
+            if options['max_queries'] is not None and max(queries) > options['max_queries']:
+                failures.append(f"{view} ran {max(queries)} queries > {options['max_queries']}")
+
+        if failures:
+            raise CommandError('Performance budget exceeded: ' + '; '.join(failures))
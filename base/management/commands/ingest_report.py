@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.utils.fetcher import scraper_setting
+from base.utils.telemetry import summary_lines
+
+
+class Command(BaseCommand):
+    help = 'Print the telemetry summary of a save_matches_data run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=None, help="Report file, defaults to SCRAPER['REPORT_FILE']")
+        parser.add_argument('--prefix', default='', help='Only timings starting with this, e.g. fetch. or parse.')
+        parser.add_argument('--dropped', action='store_true', help='List every dropped match')
+
+    def handle(self, *args, **options):
+        path = options['path'] or scraper_setting('REPORT_FILE')
+        if not path:
+            raise CommandError("No report file given and SCRAPER['REPORT_FILE'] isn't set")
+        try:
+            with open(path, encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError) as err:
+            raise CommandError(f"Can't read {path}: {err}")
+
+        self.stdout.write('\n'.join(summary_lines(report, options['prefix'])))
+        if options['dropped']:
+            for drop in report['dropped']['matches']:
+                self.stdout.write(f"{drop['match_id']:<12}{drop['reason']}")
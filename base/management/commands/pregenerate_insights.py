@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from base.tasks import pregenerate_insights
+
+
+class Command(BaseCommand):
+    help = 'Generate the missing AI insights of upcoming matches'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write(self.style.NOTICE("Generating AI insights..."))
+        count = pregenerate_insights()
+        self.stdout.write(self.style.SUCCESS(f"Done, {count} insights saved."))
@@ -1,11 +1,17 @@
 from django.core.management.base import BaseCommand
+from base.utils.fetcher import scraper_setting
 from base.utils.scrape import save_match_to_db  # Import your function
+from base.utils.telemetry import summary_lines
 
 class Command(BaseCommand):
     help = 'Fetch and save matches data'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--report', default=None,
+                            help="Where to write the run's telemetry, defaults to SCRAPER['REPORT_FILE']")
+
     def handle(self, *args, **kwargs):
         self.stdout.write(self.style.NOTICE("Saving matches data..."))
-        save_match_to_db()
+        run = save_match_to_db(report_file=kwargs['report'] or scraper_setting('REPORT_FILE'))
         self.stdout.write(self.style.SUCCESS("Done saving matches data."))
-# This command can be run using:
\ No newline at end of file
+        self.stdout.write('\n'.join(summary_lines(run.report())))
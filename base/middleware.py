@@ -0,0 +1,130 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from base.timing import RequestTimings, current
+
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TIMING_DEFAULTS = {
+    'SERVER_TIMING': True,
+    'SLOW_REQUEST_MS': 500,
+    'MAX_LOGGED_QUERIES': 50,
+}
+
+
+def timing_setting(name):
+    return getattr(settings, 'REQUEST_TIMING', {}).get(name, REQUEST_TIMING_DEFAULTS[name])
+
+
+def server_timing(total, timings):
+    metrics = [
+        f'total;dur={total * 1000:.1f}',
+        f'db;dur={timings.db * 1000:.1f};desc="{len(timings.queries)} queries"',
+        f'json;dur={timings.json * 1000:.1f};desc="{timings.json_documents} documents"',
+        f'template;dur={timings.template * 1000:.1f}',
+    ]
+    return ', '.join(metrics)
+
+
+# ======================================================
+# QUERY TIMING
+# ======================================================
+def record_query(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        timings = current.get()
+        if timings is not None:
+            timings.db += elapsed
+            timings.queries.append((sql, params, elapsed))
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    # Installed on every connection rather than per request: async views run
+    # their queries on worker threads, each with its own connection. The
+    # context variable tells the wrapper which request a query belongs to.
+    # First in the list is outermost, so other wrappers' time is counted too.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+# ======================================================
+# REQUEST TIMING
+# ======================================================
+class RequestTimingMiddleware:
+    """Measures each request and reports where the time went.
+
+    Total time, ORM query count and time, MatchData JSON decoding (see
+    base.timing.TimedJSONField) and template rendering (see
+    base.timing.TimedDjangoTemplates) go out in a Server-Timing header.
+    Requests slower than SLOW_REQUEST_MS are logged with their SQL.
+    Keep it first in MIDDLEWARE so the other middleware is included.
+    Works in sync and async stacks.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported
+        for connection in connections.all(initialized_only=True):
+            time_queries(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings = RequestTimings()
+        token = current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            total = time.perf_counter() - start
+            current.reset(token)
+        return self.report(request, response, total, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            total = time.perf_counter() - start
+            current.reset(token)
+        return self.report(request, response, total, timings)
+
+    def report(self, request, response, total, timings):
+        if timing_setting('SERVER_TIMING'):
+            response['Server-Timing'] = server_timing(total, timings)
+        if total * 1000 >= timing_setting('SLOW_REQUEST_MS'):
+            self.log_slow_request(request, response, total, timings)
+        return response
+
+    def log_slow_request(self, request, response, total, timings):
+        limit = timing_setting('MAX_LOGGED_QUERIES')
+        queries = sorted(timings.queries, key=lambda query: -query[2])
+        lines = [
+            f"🐢 Slow request {request.method} {request.get_full_path()} -> {response.status_code}: "
+            f"{server_timing(total, timings)}"
+        ]
+        # Slowest statements first
+        for sql, params, seconds in queries[:limit]:
+            lines.append(f"  {seconds * 1000:8.2f} ms  {sql}  {params!r:.200}")
+        if len(queries) > limit:
+            lines.append(f"  ... {len(queries) - limit} more queries")
+        logger.warning('\n'.join(lines))
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_standings_to_leagues(apps, schema_editor):
+    League = apps.get_model('base', 'League')
+    MatchData = apps.get_model('base', 'MatchData')
+
+    for match in MatchData.objects.filter(league__isnull=True):
+        data = match.data or {}
+        name = data.get('league_name')
+        if not name or name == 'Unknown League' or 'team_standings' not in data:
+            continue
+        league, _ = League.objects.get_or_create(name=name, defaults={'standings': data['team_standings']})
+        if league.standings != data['team_standings']:
+            continue  # another group of the same competition, keep its own table
+        del data['team_standings']
+        match.data = data
+        match.league = league
+        match.content_hash = ''  # recomputed by the next ingestion run
+        match.save(update_fields=['data', 'league', 'content_hash'])
+
+
+def move_standings_to_matches(apps, schema_editor):
+    MatchData = apps.get_model('base', 'MatchData')
+
+    for match in MatchData.objects.filter(league__isnull=False).select_related('league'):
+        match.data['team_standings'] = match.league.standings
+        match.content_hash = ''
+        match.save(update_fields=['data', 'content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0002_matchdata_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='League',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('standings', models.JSONField(default=list)),
+                ('content_hash', models.CharField(blank=True, default='', max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='matchdata',
+            name='league',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='matches', to='base.league'),
+        ),
+        migrations.RunPython(move_standings_to_leagues, move_standings_to_matches),
+    ]
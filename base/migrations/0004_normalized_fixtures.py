@@ -0,0 +1,115 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+RESULT_FIELDS = ('date', 'home', 'away', 'score', 'half_score')
+
+
+def backfill_fixtures(apps, schema_editor):
+    # Kept self-contained on purpose: base.utils.ingest.sync_fixtures
+    # follows the current models, this has to follow the historical ones
+    MatchData = apps.get_model('base', 'MatchData')
+    Team = apps.get_model('base', 'Team')
+    Fixture = apps.get_model('base', 'Fixture')
+    TeamResult = apps.get_model('base', 'TeamResult')
+    H2HResult = apps.get_model('base', 'H2HResult')
+
+    def team(name):
+        return Team.objects.get_or_create(name=name)[0]
+
+    def fields(result):
+        return {field: result.get(field, '') for field in RESULT_FIELDS}
+
+    for row in MatchData.objects.iterator():
+        data = row.data or {}
+        home = data.get('home_team_last_matches') or {}
+        away = data.get('away_team_last_matches') or {}
+        if not home.get('team_name', '').strip() or not away.get('team_name', '').strip():
+            continue
+
+        fixture = Fixture.objects.create(
+            match_data=row,
+            match_id=row.match_id,
+            league_id=row.league_id,
+            league_name=data.get('league_name') or '',
+            home=team(home['team_name'].strip()),
+            away=team(away['team_name'].strip()),
+            start_time=data.get('start_time') or '',
+        )
+        for side, last_matches, side_team in (('home', home, fixture.home), ('away', away, fixture.away)):
+            TeamResult.objects.bulk_create([
+                TeamResult(fixture=fixture, team=side_team, side=side, position=position, **fields(result))
+                for position, result in enumerate(last_matches.get('matches') or [])
+            ])
+        H2HResult.objects.bulk_create([
+            H2HResult(fixture=fixture, position=position, **fields(result))
+            for position, result in enumerate(data.get('team_head_to_head') or [])
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0003_league'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Team',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Fixture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_id', models.CharField(max_length=20, unique=True)),
+                ('league_name', models.CharField(max_length=200)),
+                ('start_time', models.CharField(blank=True, default='', max_length=5)),
+                ('league', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='fixtures', to='base.league')),
+                ('match_data', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fixture', to='base.matchdata')),
+                ('away', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='away_fixtures', to='base.team')),
+                ('home', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='home_fixtures', to='base.team')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='H2HResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('date', models.CharField(max_length=10)),
+                ('home', models.CharField(max_length=200)),
+                ('away', models.CharField(max_length=200)),
+                ('score', models.CharField(max_length=20)),
+                ('half_score', models.CharField(blank=True, max_length=20)),
+                ('fixture', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='h2h_results', to='base.fixture')),
+            ],
+            options={
+                'ordering': ['position'],
+                'indexes': [models.Index(fields=['fixture', 'position'], name='base_h2hres_fixture_2e9630_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TeamResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('side', models.CharField(choices=[('home', 'Home'), ('away', 'Away')], max_length=4)),
+                ('position', models.PositiveSmallIntegerField()),
+                ('date', models.CharField(max_length=10)),
+                ('home', models.CharField(max_length=200)),
+                ('away', models.CharField(max_length=200)),
+                ('score', models.CharField(max_length=20)),
+                ('half_score', models.CharField(blank=True, max_length=20)),
+                ('fixture', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_results', to='base.fixture')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='results', to='base.team')),
+            ],
+            options={
+                'ordering': ['position'],
+                'indexes': [models.Index(fields=['fixture', 'side', 'position'], name='base_teamre_fixture_1c2461_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_fixtures, migrations.RunPython.noop),
+    ]
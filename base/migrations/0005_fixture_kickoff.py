@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:59
+
+import datetime
+from zoneinfo import ZoneInfo
+
+from django.db import migrations, models
+
+
+def backfill_kickoff(apps, schema_editor):
+    # Rows scraped before kickoff was recorded only kept "HH:MM", pair it
+    # with the day the row was saved (the listing only has today's matches)
+    Fixture = apps.get_model('base', 'Fixture')
+    lagos_tz = ZoneInfo('Africa/Lagos')
+
+    for fixture in Fixture.objects.filter(kickoff__isnull=True).select_related('match_data'):
+        try:
+            start = datetime.datetime.strptime(fixture.start_time, '%H:%M').time()
+        except ValueError:
+            continue
+        day = fixture.match_data.created_at.astimezone(lagos_tz).date()
+        fixture.kickoff = datetime.datetime.combine(day, start, tzinfo=lagos_tz)
+        fixture.save(update_fields=['kickoff'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0004_normalized_fixtures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fixture',
+            name='kickoff',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='fixture',
+            index=models.Index(fields=['kickoff'], name='base_fixtur_kickoff_40ca77_idx'),
+        ),
+        migrations.RunPython(backfill_kickoff, migrations.RunPython.noop),
+    ]
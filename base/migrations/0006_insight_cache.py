@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_fixture_kickoff'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsightCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('text', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_used_at'], name='base_insigh_last_us_fd0126_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:07
+
+from django.db import migrations, models
+
+
+def move_insights_to_column(apps, schema_editor):
+    MatchData = apps.get_model('base', 'MatchData')
+
+    for match in MatchData.objects.filter(data__has_key='ai_insight'):
+        match.ai_insight = match.data.pop('ai_insight') or None
+        match.save(update_fields=['data', 'ai_insight'])
+
+
+def move_insights_to_data(apps, schema_editor):
+    MatchData = apps.get_model('base', 'MatchData')
+
+    for match in MatchData.objects.filter(ai_insight__isnull=False):
+        match.data['ai_insight'] = match.ai_insight
+        match.save(update_fields=['data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0006_insight_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchdata',
+            name='ai_insight',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.RunPython(move_insights_to_column, move_insights_to_data),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:08
+
+from django.db import migrations, models
+
+
+def move_insights_to_table(apps, schema_editor):
+    MatchData = apps.get_model('base', 'MatchData')
+    MatchInsight = apps.get_model('base', 'MatchInsight')
+
+    # Fingerprints are filled in by the next ingestion run. Until then both
+    # sides are blank, so existing insights stay visible.
+    MatchInsight.objects.bulk_create([
+        MatchInsight(match_id=match_id, text=text)
+        for match_id, text in MatchData.objects.filter(ai_insight__isnull=False).values_list('match_id', 'ai_insight')
+    ])
+
+
+def move_insights_to_column(apps, schema_editor):
+    MatchData = apps.get_model('base', 'MatchData')
+    MatchInsight = apps.get_model('base', 'MatchInsight')
+
+    for match in MatchData.objects.all():
+        insight = MatchInsight.objects.filter(match_id=match.match_id, fingerprint=match.insight_fingerprint).first()
+        if insight is not None:
+            match.ai_insight = insight.text
+            match.save(update_fields=['ai_insight'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_matchdata_ai_insight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchdata',
+            name='insight_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='MatchInsight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_id', models.CharField(max_length=20)),
+                ('fingerprint', models.CharField(blank=True, default='', max_length=64)),
+                ('text', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('match_id', 'fingerprint'), name='unique_match_insight')],
+            },
+        ),
+        migrations.RunPython(move_insights_to_table, move_insights_to_column),
+        migrations.RemoveField(
+            model_name='matchdata',
+            name='ai_insight',
+        ),
+    ]
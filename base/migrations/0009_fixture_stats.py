@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0008_match_insight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fixture',
+            name='stats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,138 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:14
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SCORE_PATTERN = re.compile(r'(\d+)\s*[-:]\s*(\d+)')
+
+
+def parse_score(score):
+    match = SCORE_PATTERN.search(score or '')
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def add_played(standings):
+    if not isinstance(standings, list):
+        return standings
+    rows = []
+    for row in standings:
+        try:
+            row = {**row, 'played': int(row['w']) + int(row['d']) + int(row['l'])}
+        except (KeyError, TypeError, ValueError):
+            pass
+        rows.append(row)
+    return rows
+
+
+def precompute_form(apps, schema_editor):
+    # Kept self-contained on purpose, like 0004: base.utils.ingest will move on
+    Fixture = apps.get_model('base', 'Fixture')
+    TeamResult = apps.get_model('base', 'TeamResult')
+    TeamForm = apps.get_model('base', 'TeamForm')
+    H2HResult = apps.get_model('base', 'H2HResult')
+    League = apps.get_model('base', 'League')
+    MatchData = apps.get_model('base', 'MatchData')
+
+    for fixture in Fixture.objects.select_related('home', 'away'):
+        for side, team in (('home', fixture.home), ('away', fixture.away)):
+            results = list(TeamResult.objects.filter(fixture=fixture, side=side).order_by('position'))
+            for result in results:
+                result.at_home = result.home.strip() == team.name
+                goals = parse_score(result.score)
+                if goals is None or not (result.at_home or result.away.strip() == team.name):
+                    continue
+                result.goals_for, result.goals_against = goals if result.at_home else goals[::-1]
+                result.outcome = (
+                    'W' if result.goals_for > result.goals_against
+                    else 'L' if result.goals_for < result.goals_against else 'D'
+                )
+            TeamResult.objects.bulk_update(results, ['at_home', 'goals_for', 'goals_against', 'outcome'])
+
+            scored = [result for result in results if result.outcome]
+            form = ''.join(result.outcome for result in scored)
+            TeamForm.objects.create(
+                fixture=fixture, team=team, side=side, form=form, played=len(form),
+                wins=form.count('W'), draws=form.count('D'), losses=form.count('L'),
+                goals_for=sum(result.goals_for for result in scored),
+                goals_against=sum(result.goals_against for result in scored),
+                clean_sheets=sum(result.goals_against == 0 for result in scored),
+            )
+
+    results = list(H2HResult.objects.all())
+    for result in results:
+        result.home_goals, result.away_goals = parse_score(result.score) or (None, None)
+    H2HResult.objects.bulk_update(results, ['home_goals', 'away_goals'])
+
+    for league in League.objects.all():
+        league.standings = add_played(league.standings)
+        league.content_hash = ''  # recomputed by the next ingestion run
+        league.save(update_fields=['standings', 'content_hash'])
+
+    for match in MatchData.objects.filter(data__has_key='team_standings'):
+        match.data['team_standings'] = add_played(match.data['team_standings'])
+        match.content_hash = ''
+        match.save(update_fields=['data', 'content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0009_fixture_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='h2hresult',
+            name='away_goals',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='h2hresult',
+            name='home_goals',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='teamresult',
+            name='at_home',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='teamresult',
+            name='goals_against',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='teamresult',
+            name='goals_for',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='teamresult',
+            name='outcome',
+            field=models.CharField(blank=True, default='', max_length=1),
+        ),
+        migrations.CreateModel(
+            name='TeamForm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('side', models.CharField(choices=[('home', 'Home'), ('away', 'Away')], max_length=4)),
+                ('form', models.CharField(blank=True, default='', max_length=50)),
+                ('played', models.PositiveSmallIntegerField(default=0)),
+                ('wins', models.PositiveSmallIntegerField(default=0)),
+                ('draws', models.PositiveSmallIntegerField(default=0)),
+                ('losses', models.PositiveSmallIntegerField(default=0)),
+                ('goals_for', models.PositiveSmallIntegerField(default=0)),
+                ('goals_against', models.PositiveSmallIntegerField(default=0)),
+                ('clean_sheets', models.PositiveSmallIntegerField(default=0)),
+                ('fixture', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forms', to='base.fixture')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='forms', to='base.team')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fixture', 'side'), name='unique_fixture_form')],
+            },
+        ),
+        migrations.RunPython(precompute_form, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:07
+
+from django.db import migrations, models
+
+
+def backfill_at_away(apps, schema_editor):
+    # Self-contained like 0010: the side is just a name comparison
+    TeamResult = apps.get_model('base', 'TeamResult')
+    results = list(TeamResult.objects.select_related('team'))
+    for result in results:
+        result.at_away = result.away.strip() == result.team.name
+    TeamResult.objects.bulk_update(results, ['at_away'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0012_insight_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teamresult',
+            name='at_away',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_at_away, migrations.RunPython.noop),
+    ]
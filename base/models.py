@@ -1,8 +1,24 @@
 from django.db import models
 
+from base.timing import TimedJSONField
+
+
+class League(models.Model):
+    name = models.CharField(max_length=200, unique=True)
+    standings = models.JSONField(default=list)  # one shared table for every match of the league
+    content_hash = models.CharField(max_length=64, blank=True, default='')  # sha256 of standings
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
 class MatchData(models.Model):
     match_id = models.CharField(max_length=20, unique=True)
-    data = models.JSONField()  # stores the full JSON object you showed
+    data = TimedJSONField()  # stores the full JSON object you showed
+    content_hash = models.CharField(max_length=64, blank=True, default='')  # sha256 of data, see base.utils.ingest
+    league = models.ForeignKey(League, null=True, blank=True, on_delete=models.SET_NULL, related_name='matches')
+    insight_fingerprint = models.CharField(max_length=64, blank=True, default='')  # see MatchInsight
     created_at = models.DateTimeField(auto_now_add=True)  # timestamp when data was saved
 
     class Meta:
@@ -13,3 +29,147 @@ class MatchData(models.Model):
 
     def __str__(self):
         return f"{self.match_id}"
+
+    def get_standings(self):
+        # Standings are shared per league, some rows carry their own
+        if self.league is not None:
+            return self.league.standings
+        return (self.data or {}).get('team_standings') or []
+
+
+class Team(models.Model):
+    name = models.CharField(max_length=200, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Fixture(models.Model):
+    # Normalized view of a MatchData row, built at ingestion so pages can
+    # load only the columns they render instead of the whole JSON blob
+    match_data = models.OneToOneField(MatchData, on_delete=models.CASCADE, related_name='fixture')
+    match_id = models.CharField(max_length=20, unique=True)
+    league = models.ForeignKey(League, null=True, blank=True, on_delete=models.SET_NULL, related_name='fixtures')
+    league_name = models.CharField(max_length=200)
+    home = models.ForeignKey(Team, on_delete=models.PROTECT, related_name='home_fixtures')
+    away = models.ForeignKey(Team, on_delete=models.PROTECT, related_name='away_fixtures')
+    start_time = models.CharField(max_length=5, blank=True, default='')  # "HH:MM" as scraped
+    kickoff = models.DateTimeField(null=True, blank=True)  # from the listing's epoch start-time
+    stats = models.JSONField(default=dict, blank=True)  # baseline model output, see base.utils.stats
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kickoff']),
+        ]
+
+    def __str__(self):
+        return f"{self.match_id}: {self.home} vs {self.away}"
+
+
+class TeamResult(models.Model):
+    HOME = 'home'
+    AWAY = 'away'
+    SIDES = [(HOME, 'Home'), (AWAY, 'Away')]
+
+    fixture = models.ForeignKey(Fixture, on_delete=models.CASCADE, related_name='team_results')
+    team = models.ForeignKey(Team, on_delete=models.PROTECT, related_name='results')
+    side = models.CharField(max_length=4, choices=SIDES)
+    position = models.PositiveSmallIntegerField()  # 0 is the most recent match
+    date = models.CharField(max_length=10)
+    home = models.CharField(max_length=200)
+    away = models.CharField(max_length=200)
+    score = models.CharField(max_length=20)
+    half_score = models.CharField(max_length=20, blank=True)
+    # Parsed once at ingestion, from this team's point of view
+    at_home = models.BooleanField(default=False)
+    at_away = models.BooleanField(default=False)  # neither is set when the team isn't found
+    goals_for = models.PositiveSmallIntegerField(null=True, blank=True)
+    goals_against = models.PositiveSmallIntegerField(null=True, blank=True)
+    outcome = models.CharField(max_length=1, blank=True, default='')  # W, D, L or blank without a score
+
+    class Meta:
+        ordering = ['position']
+        indexes = [
+            models.Index(fields=['fixture', 'side', 'position']),
+        ]
+
+
+class TeamForm(models.Model):
+    # Aggregates of one side's TeamResult rows, built with them at ingestion
+    fixture = models.ForeignKey(Fixture, on_delete=models.CASCADE, related_name='forms')
+    team = models.ForeignKey(Team, on_delete=models.PROTECT, related_name='forms')
+    side = models.CharField(max_length=4, choices=TeamResult.SIDES)
+    form = models.CharField(max_length=50, blank=True, default='')  # outcomes, most recent first
+    played = models.PositiveSmallIntegerField(default=0)
+    wins = models.PositiveSmallIntegerField(default=0)
+    draws = models.PositiveSmallIntegerField(default=0)
+    losses = models.PositiveSmallIntegerField(default=0)
+    goals_for = models.PositiveSmallIntegerField(default=0)
+    goals_against = models.PositiveSmallIntegerField(default=0)
+    clean_sheets = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fixture', 'side'], name='unique_fixture_form'),
+        ]
+
+
+class H2HResult(models.Model):
+    fixture = models.ForeignKey(Fixture, on_delete=models.CASCADE, related_name='h2h_results')
+    position = models.PositiveSmallIntegerField()  # 0 is the most recent meeting
+    date = models.CharField(max_length=10)
+    home = models.CharField(max_length=200)
+    away = models.CharField(max_length=200)
+    score = models.CharField(max_length=20)
+    half_score = models.CharField(max_length=20, blank=True)
+    home_goals = models.PositiveSmallIntegerField(null=True, blank=True)
+    away_goals = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['position']
+        indexes = [
+            models.Index(fields=['fixture', 'position']),
+        ]
+
+
+class MatchInsight(models.Model):
+    # Lives apart from MatchData so re-ingesting a match keeps its insight.
+    # An insight belongs to the match row whose insight_fingerprint it
+    # carries, a new fingerprint means the inputs changed.
+    match_id = models.CharField(max_length=20)
+    fingerprint = models.CharField(max_length=64, blank=True, default='')  # sha256 of the prompt summary
+    text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['match_id', 'fingerprint'], name='unique_match_insight'),
+        ]
+
+    def __str__(self):
+        return f"{self.match_id}"
+
+
+class InsightCacheEntry(models.Model):
+    key = models.CharField(max_length=64, unique=True)  # sha256 of model and prompt, see base.utils.insights
+    text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_used_at']),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class InsightLease(models.Model):
+    # Single-flight markers of the insight tasks, see base.tasks. The unique
+    # key makes claiming one an atomic insert on any database.
+    key = models.CharField(max_length=100, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,174 @@
+import asyncio
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django_q.tasks import async_task
+
+from base.models import InsightLease, MatchData, MatchInsight
+from base.utils.insights import InsightEngine, evict_insight_cache, predict, prune_match_insights
+from base.utils.prompts import insight_fingerprint
+
+
+def pending_key(match_id):
+    return f"winkick:insight-pending:{match_id}"
+
+
+def lease_key(match_id):
+    return f"winkick:insight-lease:{match_id}"
+
+
+def ready_key(match_id, fingerprint):
+    return f"winkick:insight-ready:{match_id}:{fingerprint}"
+
+
+def without_insight():
+    current = MatchInsight.objects.filter(match_id=OuterRef('match_id'), fingerprint=OuterRef('insight_fingerprint'))
+    return MatchData.objects.filter(~Exists(current))
+
+
+# ======================================================
+# SINGLE-FLIGHT
+# ======================================================
+# Leases are rows with a unique key rather than cache.add markers: the
+# file cache's add isn't atomic across processes and culls entries once
+# it is full, either of which lets two workers generate the same insight.
+
+def claim(key, timeout):
+    """Insert the lease `key` for `timeout` seconds, False if someone holds it."""
+    # Pending AI tabs claim on every reload, a held lease costs them a read
+    # and no write lock
+    if held(key).exists():
+        return False
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            # A lease expires on its own if its holder dies, take it over
+            InsightLease.objects.filter(key=key, expires_at__lte=now).delete()
+            InsightLease.objects.create(key=key, expires_at=now + datetime.timedelta(seconds=timeout))
+    except IntegrityError:
+        return False
+    return True
+
+
+def release(key):
+    InsightLease.objects.filter(key=key).delete()
+
+
+def held(key):
+    return InsightLease.objects.filter(key=key, expires_at__gt=timezone.now())
+
+
+def clear_expired_leases():
+    deleted, _ = InsightLease.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def acquire_lease(match_id, timeout):
+    # Whoever inserts the lease generates the insight, everyone else skips the match
+    return claim(lease_key(match_id), timeout)
+
+
+def release_lease(match_id):
+    release(lease_key(match_id))
+
+
+def prompt_input(row):
+    return {**row.data, 'team_standings': row.get_standings()}
+
+
+def save_insight(row, text, match=None):
+    """Store the insight of a match row, unless one was stored meanwhile.
+
+    `match` is the input the text was generated from. Its fingerprint is
+    the one stored, so an insight written from a table that has changed
+    since never passes for the current one.
+    """
+    fingerprint = insight_fingerprint(match) if match is not None else row.insight_fingerprint
+    insight, created = MatchInsight.objects.get_or_create(
+        match_id=row.match_id, fingerprint=fingerprint, defaults={'text': text},
+    )
+    release(pending_key(row.match_id))
+    # Tells requests waiting for it without a database query, see
+    # base.views.wait_for_insight
+    cache.set(ready_key(row.match_id, fingerprint), insight.text, settings.INSIGHT_PENDING_TIMEOUT)
+    return created
+
+
+# ======================================================
+# AI INSIGHT TASKS (run by the django-q cluster)
+# ======================================================
+def generate_insight(match_id):
+    if not acquire_lease(match_id, settings.Q_CLUSTER['timeout']):
+        print(f"⏭️ AI insight for match {match_id} is already being generated")
+        return
+
+    try:
+        game_details = without_insight().select_related('league').filter(match_id=match_id).first()
+        if game_details is None:
+            return
+        match = prompt_input(game_details)
+        text = predict(match)
+        if text and save_insight(game_details, text, match):
+            print(f"✅ AI insight saved for match {match_id}")
+    finally:
+        release_lease(match_id)
+
+
+def pregenerate_insights(match_ids=None):
+    """Generate the missing insights of upcoming matches concurrently."""
+    rows = without_insight().select_related('league')
+    if match_ids is None:
+        rows = rows.filter(fixture__kickoff__gte=timezone.now())
+    else:
+        rows = rows.filter(match_id__in=match_ids)
+    rows = [row for row in rows if acquire_lease(row.match_id, settings.INSIGHT_BATCH_TIMEOUT)]
+
+    try:
+        engine = InsightEngine()
+        matches = {row.match_id: prompt_input(row) for row in rows}
+        insights = asyncio.run(engine.run(list(matches.values())))
+        for row in rows:
+            if row.match_id in insights:
+                save_insight(row, insights[row.match_id], matches[row.match_id])
+    finally:
+        for row in rows:
+            release_lease(row.match_id)
+
+    clear_expired_leases()
+    evicted = evict_insight_cache()
+    retired = prune_match_insights()
+    print(
+        f"🤖 {len(insights)}/{len(rows)} AI insights saved: {engine.generated} generated, "
+        f"{engine.cached} from cache, {engine.failed} failed, {engine.prompt_tokens} prompt tokens, "
+        f"{evicted} cache entries evicted, {retired} old insights removed"
+    )
+    return len(insights)
+
+
+def enqueue_insight(match_id):
+    # The pending page is polled, only the first poll queues a task. The
+    # marker expires so a failed task gets retried by a later poll.
+    if not claim(pending_key(match_id), settings.INSIGHT_PENDING_TIMEOUT):
+        return False
+    async_task('base.tasks.generate_insight', match_id, task_name=f"insight-{match_id}")
+    return True
+
+
+def enqueue_upcoming_insights():
+    """Queue one batch task for every upcoming match without an insight."""
+    clear_expired_leases()
+    match_ids = [
+        match_id
+        for match_id in without_insight().filter(fixture__kickoff__gte=timezone.now()).values_list('match_id', flat=True)
+        if claim(pending_key(match_id), settings.INSIGHT_BATCH_TIMEOUT)
+    ]
+    if match_ids:
+        async_task(
+            'base.tasks.pregenerate_insights', match_ids,
+            task_name='pregenerate-insights', timeout=settings.INSIGHT_BATCH_TIMEOUT,
+        )
+    return len(match_ids)
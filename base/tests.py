@@ -1,3 +1,676 @@
-from django.test import TestCase
+import asyncio
+import collections
+import contextlib
+import copy
+import datetime
+import tempfile
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from base.benchmarks.data import synthetic_matches
+from base.benchmarks.livescore import Matchday
+from base.cache import ingestion_generation
+from base.models import Fixture, InsightCacheEntry, InsightLease, MatchData, MatchInsight, TeamResult
+from base.tasks import claim, clear_expired_leases, held, release, save_insight
+from base.timing import RequestTimings, current
+from base.utils.fetcher import FetchSession
+from base.utils.ingest import MatchWriter
+from base.utils.insights import InsightEngine, insight_key, prune_match_insights
+from base.utils.parsers import parse_today_matches
+from base.utils.prompts import estimate_tokens, insight_fingerprint
+from base.utils.scrape import fetch_match_pages
+from base.utils.stats import PRIOR_GOALS, batch_stats, match_stats
+from base.utils.telemetry import Timing, percentile
+from base.views import wait_for_insight
+
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+NO_HTTP_CACHE = {**settings.SCRAPER, 'HTTP_CACHE_DIR': None}
+
+
+class StubPages:
+    """Serves a Matchday's pages in place of FetchSession._download.
+
+    The first download of each endpoint in `fail` returns None, like a
+    download that gave up after its retries.
+    """
+
+    def __init__(self, matchday, fail=()):
+        self.matchday = matchday
+        self.fail = set(fail)
+        self.requested = []
+
+    def page(self, url):
+        parts = urlsplit(url)
+        match_id = parse_qs(parts.query).get('id', [''])[0]
+        if parts.path == '/en/':
+            return self.matchday.homepage
+        if parts.path.startswith('/en/football/event/'):
+            return self.matchday.event(parts.path.rstrip('/').rsplit('/', 1)[1])
+        for name in ('last_matches', 'h2h', 'standings'):
+            if name in parts.path:
+                return getattr(self.matchday, name)(match_id)
+        return None
+
+    async def download(self, url):
+        self.requested.append(url)
+        for name in list(self.fail):
+            if name in url:
+                self.fail.discard(name)
+                return None
+        return self.page(url)
+
+    def session(self):
+        session = FetchSession(None)
+        session._download = self.download
+        return session
+
+
+# ======================================================
+# FETCH SESSION
+# ======================================================
+@override_settings(SCRAPER=NO_HTTP_CACHE)
+class FetchSessionTests(SimpleTestCase):
+    def setUp(self):
+        self.downloads = []
+        self.session = FetchSession(None)
+        self.session._download = self.download
+
+    async def download(self, url):
+        self.downloads.append(url)
+        await asyncio.sleep(0.01)
+        if 'broken' in url:
+            raise aiohttp.ClientError(url)
+        return f"<p>{url}</p>"
+
+    async def test_concurrent_requests_share_one_download(self):
+        pages = await asyncio.gather(*(self.session.text('https://example.com/a') for _ in range(5)))
+
+        self.assertEqual(pages, ['<p>https://example.com/a</p>'] * 5)
+        self.assertEqual(self.downloads, ['https://example.com/a'])
+
+    async def test_later_requests_come_from_the_run_cache(self):
+        await self.session.text('https://example.com/a')
+        await self.session.text('https://example.com/a')
+        self.assertEqual(len(self.downloads), 1)
+
+        self.session.forget('https://example.com/a')
+        await self.session.text('https://example.com/a')
+        self.assertEqual(len(self.downloads), 2)
+
+    async def test_failures_are_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(aiohttp.ClientError):
+                await self.session.text('https://example.com/broken')
+        self.assertEqual(len(self.downloads), 2)
+
+
+# ======================================================
+# RETRIES
+# ======================================================
+@contextlib.asynccontextmanager
+async def local_server(routes):
+    """An aiohttp client and the URL of a local server answering `routes`."""
+    app = web.Application()
+    for path, handler in routes.items():
+        app.router.add_get(path, handler)
+    async with TestServer(app) as server, aiohttp.ClientSession() as client:
+        yield client, str(server.make_url('/'))
+
+
+@override_settings(SCRAPER={**NO_HTTP_CACHE, 'RETRIES': 2, 'BACKOFF_BASE': 0.001, 'BACKOFF_MAX': 0.01})
+class RetryTests(SimpleTestCase):
+    def setUp(self):
+        self.requests = collections.Counter()
+
+    def respond(self, *statuses):
+        """Answer with `statuses` in turn, then 200 for good."""
+        async def handler(request):
+            self.requests[request.path] += 1
+            status = statuses[self.requests[request.path] - 1] if self.requests[request.path] <= len(statuses) else 200
+            return web.Response(status=status, text='ok', headers={'Retry-After': '0'})
+        return handler
+
+    async def test_server_errors_are_retried(self):
+        async with local_server({'/flaky': self.respond(503, 429)}) as (client, base_url):
+            self.assertEqual(await FetchSession(client).text(f"{base_url}flaky"), 'ok')
+        self.assertEqual(self.requests['/flaky'], 3)
+
+    async def test_gives_up_after_the_last_retry(self):
+        async with local_server({'/down': self.respond(503, 503, 503, 503)}) as (client, base_url):
+            self.assertIsNone(await FetchSession(client).text(f"{base_url}down"))
+        self.assertEqual(self.requests['/down'], 3)
+
+    async def test_other_errors_are_not_retried(self):
+        async with local_server({'/missing': self.respond(404)}) as (client, base_url):
+            self.assertIsNone(await FetchSession(client).text(f"{base_url}missing"))
+        self.assertEqual(self.requests['/missing'], 1)
+
+    def test_backoff_honours_retry_after_up_to_the_cap(self):
+        session = FetchSession(None)
+        self.assertEqual(session._backoff(0, '5'), 0.01)
+        with override_settings(SCRAPER={**NO_HTTP_CACHE, 'BACKOFF_MAX': 30}):
+            self.assertEqual(FetchSession(None)._backoff(0, '5'), 5)
+
+
+# ======================================================
+# PERSISTENT HTTP CACHE
+# ======================================================
+class HttpCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.validators = []
+
+    async def page(self, request):
+        self.validators.append(request.headers.get('If-None-Match'))
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304)
+        return web.Response(text='<p>table</p>', headers={'ETag': '"v1"'})
+
+    async def fetch_twice(self, ttls):
+        """Fetch the page in two runs sharing the cache directory."""
+        scraper = {**NO_HTTP_CACHE, 'HTTP_CACHE_DIR': self.cache_dir, 'HTTP_CACHE_TTLS': ttls}
+        texts = []
+        async with local_server({'/standings': self.page}) as (client, base_url):
+            with override_settings(SCRAPER=scraper):
+                for _ in range(2):
+                    texts.append(await FetchSession(client).text(f"{base_url}standings"))
+        return texts
+
+    async def test_stale_entry_is_revalidated(self):
+        texts = await self.fetch_twice({})
+
+        self.assertEqual(texts, ['<p>table</p>'] * 2)
+        self.assertEqual(self.validators, [None, '"v1"'])
+
+    async def test_fresh_entry_skips_the_network(self):
+        texts = await self.fetch_twice({'/standings': 3600})
+
+        self.assertEqual(texts, ['<p>table</p>'] * 2)
+        self.assertEqual(self.validators, [None])
+
+
+# ======================================================
+# SHARED LEAGUE STANDINGS
+# ======================================================
+@override_settings(SCRAPER=NO_HTTP_CACHE)
+class SharedStandingsTests(SimpleTestCase):
+    def setUp(self):
+        # Two matches of the same generated league
+        self.matchday = Matchday(2)
+        self.listing = parse_today_matches(self.matchday.homepage)
+
+    async def fetch_all(self, pages):
+        session = pages.session()
+        return [await fetch_match_pages(session, match) for match in self.listing]
+
+    async def test_league_downloads_its_table_once(self):
+        pages = StubPages(self.matchday)
+        results = await self.fetch_all(pages)
+
+        self.assertEqual(len([url for url in pages.requested if 'standings' in url]), 1)
+        self.assertEqual(results[0]['standings'], results[1]['standings'])
+
+    async def test_failed_league_table_falls_back_to_the_match_page(self):
+        pages = StubPages(self.matchday, fail=['standings'])
+        results = await self.fetch_all(pages)
+
+        self.assertTrue(all(result['standings'] for result in results))
+        self.assertEqual(len([url for url in pages.requested if 'standings' in url]), 3)
+
+
+# ======================================================
+# MATCH WRITER
+# ======================================================
+@override_settings(CACHES=NO_CACHE)
+class MatchWriterTests(TestCase):
+    def setUp(self):
+        self.matches = synthetic_matches(6, seed=1)
+        MatchWriter().write(self.matches)
+
+    def test_first_write_creates_every_match(self):
+        self.assertEqual(MatchData.objects.count(), 6)
+        self.assertEqual(Fixture.objects.count(), 6)
+
+    def test_same_matches_are_left_unchanged(self):
+        writer = MatchWriter()
+        writer.write(copy.deepcopy(self.matches))
+
+        self.assertEqual((writer.created, writer.updated, writer.unchanged), (0, 0, 6))
+
+    def test_changed_match_is_updated(self):
+        changed = copy.deepcopy(self.matches)
+        changed[0]['team_head_to_head'] = changed[0]['team_head_to_head'][1:]
+        writer = MatchWriter()
+        writer.write(changed)
+
+        self.assertEqual((writer.created, writer.updated, writer.unchanged), (0, 1, 5))
+        row = MatchData.objects.get(match_id=changed[0]['match_id'])
+        self.assertEqual(row.data['team_head_to_head'], changed[0]['team_head_to_head'])
+
+    def test_delete_stale_removes_unlisted_matches(self):
+        writer = MatchWriter()
+        writer.keep([match['match_id'] for match in self.matches[:4]])
+        writer.write(self.matches[:4])
+        writer.delete_stale()
+
+        # Only MatchData rows count, not the fixtures and results that cascade
+        self.assertEqual(writer.deleted, 2)
+        self.assertEqual(
+            sorted(MatchData.objects.values_list('match_id', flat=True)),
+            sorted(match['match_id'] for match in self.matches[:4]),
+        )
+        self.assertEqual(Fixture.objects.count(), 4)
+
+    def test_delete_stale_keeps_listed_matches_that_were_dropped(self):
+        writer = MatchWriter()
+        writer.keep([match['match_id'] for match in self.matches])
+        writer.write(self.matches[:4])
+        writer.delete_stale()
+
+        self.assertEqual(writer.deleted, 0)
+        self.assertEqual(MatchData.objects.count(), 6)
+
+
+@override_settings(CACHES=NO_CACHE)
+class LeagueTableChangeTests(TestCase):
+    def setUp(self):
+        # Four matches of one generated league, sharing its table
+        self.matches = synthetic_matches(4, seed=4)
+        MatchWriter().write(copy.deepcopy(self.matches))
+        table = self.matches[0]['team_standings']
+        self.new_table = [{**row, 'pos': len(table) - index} for index, row in enumerate(table)]
+
+    def with_new_table(self, matches):
+        return [{**match, 'team_standings': self.new_table} for match in matches]
+
+    def positions(self):
+        return {
+            fixture.match_id: [team['position'] for team in fixture.stats['teams']]
+            for fixture in Fixture.objects.all()
+        }
+
+    def expected_positions(self):
+        position = {row['team']: row['pos'] for row in self.new_table}
+        return {
+            match['match_id']: [
+                position[match['home_team_last_matches']['team_name'].strip()],
+                position[match['away_team_last_matches']['team_name'].strip()],
+            ]
+            for match in self.matches
+        }
+
+    def test_new_table_updates_every_row_of_the_league(self):
+        writer = MatchWriter()
+        writer.write(self.with_new_table(self.matches))
+
+        self.assertEqual((writer.created, writer.updated, writer.unchanged), (0, 4, 0))
+        self.assertEqual(self.positions(), self.expected_positions())
+        self.assertEqual(self.fingerprints(), self.expected_fingerprints())
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_new_table_starts_a_new_page_cache_generation(self):
+        generation = ingestion_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            MatchWriter().save_leagues(self.with_new_table(self.matches))
+
+        self.assertNotEqual(ingestion_generation(), generation)
+
+    def fingerprints(self):
+        return dict(MatchData.objects.values_list('match_id', 'insight_fingerprint'))
+
+    def expected_fingerprints(self):
+        return {match['match_id']: insight_fingerprint(match) for match in self.with_new_table(self.matches)}
+
+    def test_rows_outside_the_batch_are_rebuilt_once(self):
+        writer = MatchWriter()
+        writer.write(self.with_new_table(self.matches[:2]))
+        self.assertEqual(self.positions(), self.expected_positions())
+        self.assertEqual(self.fingerprints(), self.expected_fingerprints())
+
+        writer.write(self.with_new_table(self.matches[2:]))
+        self.assertEqual((writer.created, writer.updated, writer.unchanged), (0, 4, 2))
+
+
+# ======================================================
+# LAST MATCHES PAGE
+# ======================================================
+@override_settings(CACHES=NO_CACHE)
+class LastMatchesSideTests(TestCase):
+    def setUp(self):
+        match = synthetic_matches(1, seed=3)[0]
+        team = match['home_team_last_matches']
+        self.team = team['team_name'].strip()
+        results = [
+            {'date': '01/01/26', 'home': 'Postponed Rovers', 'score': 'P-P', 'away': self.team, 'half_score': ''},
+            {'date': '02/01/26', 'home': 'Elsewhere FC', 'score': '1 - 0', 'away': 'Nobody United', 'half_score': ''},
+        ]
+        match['home_team_last_matches'] = {**team, 'matches': results + team['matches']}
+        MatchWriter().write([match])
+        self.match_id = match['match_id']
+
+    def side(self, home):
+        result = TeamResult.objects.get(side=TeamResult.HOME, home=home)
+        return result.at_home, result.at_away, result.outcome
+
+    def test_side_is_stored_without_a_score(self):
+        self.assertEqual(self.side('Postponed Rovers'), (False, True, ''))
+        self.assertEqual(self.side('Elsewhere FC'), (False, False, ''))
+
+    def test_away_team_is_bold_without_a_score(self):
+        response = self.client.get(reverse('base:last_matches', args=[self.match_id]))
+        bold = f'<p class="bold-name">{self.team}</p>'
+        found = TeamResult.objects.filter(team__name=self.team).exclude(at_home=False, at_away=False).count()
+
+        self.assertEqual(response.content.decode().count(bold), found)
+        self.assertNotContains(response, '<p class="bold-name">Nobody United</p>')
+
+
+# ======================================================
+# CONDITIONAL MATCH PAGES
+# ======================================================
+@override_settings(CACHES=NO_CACHE)
+class ConditionalPageTests(TestCase):
+    def setUp(self):
+        self.matches = synthetic_matches(2, seed=6)
+        MatchWriter().write(copy.deepcopy(self.matches))
+        self.match_id = self.matches[0]['match_id']
+
+    def test_unchanged_page_is_not_modified(self):
+        for view in ('last_matches', 'h2h', 'standings'):
+            url = reverse(f'base:{view}', args=[self.match_id])
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_new_league_table_changes_the_etag(self):
+        url = reverse('base:standings', args=[self.match_id])
+        etag = self.client.get(url)['ETag']
+
+        table = self.matches[0]['team_standings'][::-1]
+        MatchWriter().write([{**match, 'team_standings': table} for match in self.matches])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unknown_match_is_not_found(self):
+        self.assertEqual(self.client.get(reverse('base:standings', args=['0'])).status_code, 404)
+
+
+# ======================================================
+# INSIGHT FINGERPRINTS
+# ======================================================
+@override_settings(CACHES=NO_CACHE)
+class InsightFingerprintTests(TestCase):
+    def setUp(self):
+        self.match = synthetic_matches(1, seed=2)[0]
+        MatchWriter().write([self.match])
+        row = MatchData.objects.get(match_id=self.match['match_id'])
+        MatchInsight.objects.create(match_id=row.match_id, fingerprint=row.insight_fingerprint, text='Close game.')
+
+    def test_insight_survives_changes_outside_the_prompt(self):
+        # The kickoff timestamp isn't in the summary the model sees
+        writer = MatchWriter()
+        writer.write([{**self.match, 'kickoff': self.match['kickoff'] + 1}])
+
+        self.assertEqual(writer.updated, 1)
+        self.assertEqual(prune_match_insights(), 0)
+        self.assertEqual(MatchInsight.objects.count(), 1)
+
+    def test_insight_is_stored_under_the_fingerprint_of_its_input(self):
+        # The table changed between generating the text and saving it
+        row = MatchData.objects.get(match_id=self.match['match_id'])
+        generated_from = {**self.match, 'team_standings': self.match['team_standings'][::-1]}
+        save_insight(row, 'Home win.', generated_from)
+
+        self.assertTrue(MatchInsight.objects.filter(fingerprint=insight_fingerprint(generated_from)).exists())
+        self.assertEqual(MatchInsight.objects.get(fingerprint=row.insight_fingerprint).text, 'Close game.')
+
+    def test_insight_is_retired_when_the_prompt_changes(self):
+        old = MatchData.objects.get(match_id=self.match['match_id']).insight_fingerprint
+        MatchWriter().write([{**self.match, 'team_head_to_head': []}])
+
+        self.assertNotEqual(MatchData.objects.get(match_id=self.match['match_id']).insight_fingerprint, old)
+        self.assertEqual(prune_match_insights(), 1)
+        self.assertFalse(MatchInsight.objects.exists())
+
+
+# ======================================================
+# INSIGHT LEASES
+# ======================================================
+class InsightLeaseTests(TestCase):
+    def test_only_one_claim_wins(self):
+        self.assertTrue(claim('lease', 60))
+        self.assertFalse(claim('lease', 60))
+
+        release('lease')
+        self.assertTrue(claim('lease', 60))
+
+    def test_held_lease_is_checked_without_writing(self):
+        claim('lease', 60)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(claim('lease', 60))
+        self.assertEqual([query['sql'].split()[0] for query in queries], ['SELECT'])
+
+    def test_expired_lease_is_taken_over(self):
+        InsightLease.objects.create(key='lease', expires_at=timezone.now() - datetime.timedelta(seconds=1))
+
+        self.assertTrue(claim('lease', 60))
+        self.assertTrue(held('lease').exists())
+
+    def test_clear_expired_leases(self):
+        InsightLease.objects.create(key='old', expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        claim('current', 60)
+
+        self.assertEqual(clear_expired_leases(), 1)
+        self.assertEqual(list(InsightLease.objects.values_list('key', flat=True)), ['current'])
+
+
+# ======================================================
+# WAITING FOR AN INSIGHT
+# ======================================================
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}, INSIGHT_WAIT_SECONDS=1,
+)
+class WaitForInsightTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        MatchWriter().write(synthetic_matches(1, seed=5))
+        self.row = MatchData.objects.get()
+
+    async def test_returns_the_insight_once_the_worker_stored_it(self):
+        await sync_to_async(save_insight)(self.row, 'Away win.')
+
+        text = await wait_for_insight(self.row.match_id, self.row.insight_fingerprint)
+        self.assertEqual(text, 'Away win.')
+
+    async def test_gives_up_after_the_wait(self):
+        self.assertIsNone(await wait_for_insight(self.row.match_id, self.row.insight_fingerprint))
+
+
+# ======================================================
+# FEED
+# ======================================================
+@override_settings(CACHES=NO_CACHE)
+@mock.patch('base.views.FEED_PAGE_SIZE', 4)
+class FeedCursorTests(TestCase):
+    def setUp(self):
+        MatchWriter().write(synthetic_matches(11, seed=3))
+
+    def feed_pages(self):
+        pages = []
+        path = reverse('base:feed')
+        while path:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['match_id'] for row in response.context['matches']])
+            cursor = response.context['next_cursor']
+            path = cursor and f"{reverse('base:feed')}?after={cursor}"
+        return pages
+
+    def test_pages_cover_upcoming_then_started_matches_once(self):
+        now = timezone.now()
+        fixtures = Fixture.objects.order_by('kickoff', 'id')
+        expected = (
+            list(fixtures.filter(kickoff__gte=now).values_list('match_id', flat=True))
+            + list(fixtures.filter(kickoff__lt=now).values_list('match_id', flat=True))
+        )
+
+        pages = self.feed_pages()
+
+        self.assertEqual([len(page) for page in pages], [4, 4, 3])
+        self.assertEqual([match_id for page in pages for match_id in page], expected)
+
+    def test_matches_without_kickoff_come_last(self):
+        # Five scheduled matches, then six without a kickoff paged by id
+        unscheduled = list(Fixture.objects.order_by('-id').values_list('id', flat=True)[:6])
+        Fixture.objects.filter(id__in=unscheduled).update(kickoff=None)
+        expected_tail = list(Fixture.objects.filter(id__in=unscheduled).order_by('id').values_list('match_id', flat=True))
+
+        feed = [match_id for page in self.feed_pages() for match_id in page]
+
+        self.assertEqual(len(feed), 11)
+        self.assertEqual(len(set(feed)), 11)
+        self.assertEqual(feed[-6:], expected_tail)
+
+    def test_bad_cursor_shows_the_first_page(self):
+        first = self.client.get(reverse('base:feed')).context['matches']
+        response = self.client.get(reverse('base:feed'), {'after': 'x.not-a-cursor'})
+
+        self.assertEqual(response.context['matches'], first)
+
+
+# ======================================================
+# INSIGHT ENGINE
+# ======================================================
+class StubClient:
+    """Answers every prompt with `text` and `usage`, like the async Gemini client."""
+
+    def __init__(self, text, usage):
+        self.response = mock.Mock(text=text, usage_metadata=usage)
+        self.aio = mock.Mock()
+        self.aio.models.generate_content = mock.AsyncMock(return_value=self.response)
+
+
+class InsightEngineTests(TestCase):
+    async def test_missing_usage_is_estimated(self):
+        for usage in (None, mock.Mock(prompt_token_count=None)):
+            with self.subTest(usage=usage):
+                engine = InsightEngine(StubClient('Home win.', usage))
+                self.assertEqual(await engine.request('prompt'), 'Home win.')
+                self.assertEqual(engine.prompt_tokens, estimate_tokens('prompt'))
+
+    async def test_reported_usage_is_counted(self):
+        engine = InsightEngine(StubClient('Home win.', mock.Mock(prompt_token_count=42)))
+        await engine.request('prompt')
+        self.assertEqual(engine.prompt_tokens, 42)
+
+    async def test_text_is_stored_before_the_accounting(self):
+        usage = mock.Mock()
+        type(usage).prompt_token_count = mock.PropertyMock(side_effect=ValueError)
+        engine = InsightEngine(StubClient('Home win.', usage))
+
+        with self.assertRaises(ValueError):
+            await engine.request('prompt')
+        stored = await InsightCacheEntry.objects.filter(key=insight_key('prompt')).aexists()
+        self.assertTrue(stored)
+
+    async def test_empty_response_fails(self):
+        engine = InsightEngine(StubClient('', None))
+        self.assertIsNone(await engine.request('prompt'))
+        self.assertEqual((engine.generated, engine.failed), (0, 1))
+        self.assertFalse(await InsightCacheEntry.objects.aexists())
+
+
+# ======================================================
+# BATCH STATISTICS
+# ======================================================
+class BatchStatsTests(SimpleTestCase):
+    def test_stats_do_not_depend_on_the_batch(self):
+        matches = synthetic_matches(5, seed=9)
+        matches[0]['home_team_last_matches'] = {**matches[0]['home_team_last_matches'], 'matches': []}
+        self.assertEqual(batch_stats(matches), [match_stats(match) for match in matches])
+        self.assertEqual(batch_stats(matches[::-1]), batch_stats(matches)[::-1])
+
+    def test_team_without_results_uses_the_prior(self):
+        match = synthetic_matches(1, seed=9)[0]
+        match['away_team_last_matches'] = {**match['away_team_last_matches'], 'matches': []}
+        stats = match_stats(match)
+
+        self.assertEqual(stats['teams'][1]['played'], 0)
+        self.assertEqual(stats['teams'][1]['goals_for'], 0.0)
+        home = stats['teams'][0]
+        self.assertAlmostEqual(stats['expected_goals'][1], (PRIOR_GOALS + home['goals_against']) / 2, places=1)
+
+    def test_unplayed_results_are_skipped(self):
+        match = synthetic_matches(1, seed=9)[0]
+        results = match['home_team_last_matches']['matches']
+        postponed = [{**result, 'score': 'P-P'} for result in results]
+        match['home_team_last_matches'] = {**match['home_team_last_matches'], 'matches': postponed + results}
+        self.assertEqual(match_stats(match), match_stats(synthetic_matches(1, seed=9)[0]))
+
+    def test_empty_batch(self):
+        self.assertEqual(batch_stats([]), [])
+
+
+# ======================================================
+# REQUEST TIMING
+# ======================================================
+class TimedJSONFieldTests(TestCase):
+    def setUp(self):
+        MatchWriter().write(synthetic_matches(2, seed=4))
+
+    def test_decoding_is_timed_within_a_request(self):
+        timings = RequestTimings()
+        token = current.set(timings)
+        try:
+            list(MatchData.objects.all())
+            list(MatchData.objects.values_list('data__home_team_last_matches', flat=True))
+        finally:
+            current.reset(token)
+        self.assertEqual(timings.json_documents, 4)
+        self.assertGreater(timings.json, 0)
+
+    def test_migrations_see_a_plain_json_field(self):
+        _, path, _, kwargs = MatchData._meta.get_field('data').deconstruct()
+        self.assertEqual((path, kwargs), ('django.db.models.JSONField', {}))
+
+
+# ======================================================
+# TELEMETRY
+# ======================================================
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 21))
+
+        self.assertEqual(percentile(values, 0.50), 10)
+        self.assertEqual(percentile(values, 0.95), 19)
+        self.assertEqual(percentile(values, 0.99), 20)
+        self.assertEqual(percentile(values, 0), 1)
+
+    def test_no_values(self):
+        self.assertEqual(percentile([], 0.95), 0.0)
+
+    def test_timing_report(self):
+        timing = Timing()
+        for ms in reversed(range(1, 101)):
+            timing.add(ms / 1000)
+        report = timing.report()
+
+        self.assertEqual((report['p50_ms'], report['p95_ms'], report['p99_ms'], report['max_ms']), (50, 95, 99, 100))
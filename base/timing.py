@@ -0,0 +1,78 @@
+import contextvars
+import time
+
+from django.db import models
+from django.template.backends.django import DjangoTemplates, Template
+
+
+# Where the time of one request goes, filled in by the pieces below and
+# read by base.middleware.RequestTimingMiddleware. The state lives in a
+# context variable so sync_to_async threads and async views add to the
+# same request's numbers. Outside a request nothing is recorded.
+
+current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = []  # (sql, params, seconds)
+        self.db = 0.0
+        self.json = 0.0
+        self.json_documents = 0
+        self.template = 0.0
+
+
+# ======================================================
+# JSON DECODING
+# ======================================================
+class TimedJSONField(models.JSONField):
+    """JSONField that adds the time spent decoding its values to the current request.
+
+    Used for MatchData.data, so every blob the ORM loads is counted,
+    including key lookups like data__home_team_last_matches. It
+    deconstructs as a plain JSONField, so migrations never import it.
+    """
+
+    def from_db_value(self, value, expression, connection):
+        timings = current.get()
+        if timings is None or not isinstance(value, str):
+            return super().from_db_value(value, expression, connection)
+        start = time.perf_counter()
+        try:
+            return super().from_db_value(value, expression, connection)
+        finally:
+            timings.json += time.perf_counter() - start
+            timings.json_documents += 1
+
+    def deconstruct(self):
+        name, _, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.JSONField', args, kwargs
+
+
+# ======================================================
+# TEMPLATE RENDERING
+# ======================================================
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = current.get()
+        if timings is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with render time added to the current request.
+
+    Only the top-level render is timed, so {% extends %} and {% include %}
+    aren't counted twice.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,53 @@
+import functools
+import os
+
+from django.conf import settings
+
+from base.utils.prompts import estimate_tokens, prediction_prompt
+
+
+# google.genai is only imported, and the client only built, the first time
+# a prediction is needed. Web workers and management commands that never
+# call the model don't pay for either.
+
+INSIGHT_DEFAULTS = {
+    'MODEL': 'gemini-2.5-flash-lite',
+    'CONCURRENCY': 8,
+    'RETRIES': 5,
+    'BACKOFF_BASE': 2,
+    'BACKOFF_MAX': 60,
+    'CACHE_MAX_AGE': 30 * 24 * 3600,
+    'CACHE_MAX_ENTRIES': 5000,
+}
+
+
+def insight_setting(name):
+    return getattr(settings, 'INSIGHTS', {}).get(name, INSIGHT_DEFAULTS[name])
+
+
+def make_client():
+    from dotenv import load_dotenv
+    from google import genai
+
+    load_dotenv()
+    return genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+
+
+@functools.cache
+def get_client():
+    # Shared by the sync calls only. The async side keeps an aiohttp session
+    # bound to the event loop it was first used on, so every asyncio.run
+    # needs its own client, see InsightEngine.run.
+    return make_client()
+
+
+def generate_prediction(match):
+    content = prediction_prompt(match)
+    response = get_client().models.generate_content(model=insight_setting('MODEL'), contents=content)
+    usage = response.usage_metadata
+    print(
+        f"🧮 Prompt for match {match.get('match_id')}: "
+        f"{usage.prompt_token_count if usage else '?'} tokens "
+        f"(~{estimate_tokens(content)} estimated, ~{estimate_tokens(repr(match))} for the raw match data)"
+    )
+    return response.text
@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import aiohttp
+from django.conf import settings
+
+from base.utils import telemetry
+
+
+SCRAPER_DEFAULTS = {
+    'BASE_URL': 'https://www.livescore.bz',
+    'MAX_CONCURRENCY_PER_HOST': 8,
+    'REQUESTS_PER_SECOND': 10,
+    'BURST': 10,
+    'TIMEOUT': 20,
+    'RETRIES': 4,
+    'BACKOFF_BASE': 0.5,
+    'BACKOFF_MAX': 30,
+    'FETCH_WORKERS': 16,
+    'PARSE_WORKERS': 4,
+    'QUEUE_SIZE': 32,
+    'BATCH_SIZE': 25,
+    'HTTP_CACHE_DIR': None,
+    'HTTP_CACHE_TTLS': {},
+    'HTTP_CACHE_MAX_AGE': 7 * 24 * 3600,
+    'REPORT_FILE': None,
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def scraper_setting(name):
+    return getattr(settings, 'SCRAPER', {}).get(name, SCRAPER_DEFAULTS[name])
+
+
+# ======================================================
+# PERSISTENT HTTP CACHE
+# ======================================================
+class HttpCache:
+    """On-disk cache of response bodies with their validators.
+
+    An entry younger than the freshness TTL of its endpoint is served
+    without touching the network, older entries are revalidated with
+    If-None-Match / If-Modified-Since. TTLs are looked up by the first
+    pattern in `ttls` that appears in the URL.
+    """
+
+    def __init__(self, directory, ttls=None, max_age=None):
+        self.directory = Path(directory)
+        self.ttls = ttls or {}
+        if max_age:
+            self.prune(max_age)
+
+    def _path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return self.directory / key[:2] / f"{key}.json"
+
+    def ttl(self, url):
+        for pattern, seconds in self.ttls.items():
+            if pattern in url:
+                return seconds
+        return 0
+
+    def get(self, url):
+        try:
+            with open(self._path(url), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, url, entry):
+        return time.time() - entry['stored_at'] < self.ttl(url)
+
+    def validators(self, entry):
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def set(self, url, body, headers):
+        entry = {
+            'url': url,
+            'body': body,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'stored_at': time.time(),
+        }
+        self._write(url, entry)
+        return entry
+
+    def touch(self, url, entry):
+        # A 304 means our copy is still good, restart its freshness window
+        entry['stored_at'] = time.time()
+        self._write(url, entry)
+
+    def _write(self, url, entry):
+        path = self._path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def prune(self, max_age):
+        cutoff = time.time() - max_age
+        for path in self.directory.glob('*/*.json'):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+
+# ======================================================
+# RATE LIMITING
+# ======================================================
+class TokenBucket:
+    """Allows `rate` acquisitions per second with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostLimiter:
+    """Caps in-flight requests and request rate for a single host."""
+
+    def __init__(self, max_concurrency, rate, burst):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.bucket = TokenBucket(rate, burst)
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        try:
+            await self.bucket.acquire()
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.semaphore.release()
+
+
+# ======================================================
+# RUN-SCOPED FETCH SESSION
+# ======================================================
+class FetchSession:
+    """Wraps an aiohttp session for the length of one ingestion run.
+
+    Every URL is downloaded at most once per run: concurrent requests for the
+    same URL share a single in-flight download, and later requests are served
+    from the run cache. Downloads go through a per-host limiter and are
+    retried with jittered exponential backoff on timeouts, 429 and 5xx.
+    When HTTP_CACHE_DIR is set, bodies are also kept on disk across runs
+    and revalidated with conditional requests.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.max_concurrency = scraper_setting('MAX_CONCURRENCY_PER_HOST')
+        self.rate = scraper_setting('REQUESTS_PER_SECOND')
+        self.burst = scraper_setting('BURST')
+        self.timeout = aiohttp.ClientTimeout(total=scraper_setting('TIMEOUT'))
+        self.retries = scraper_setting('RETRIES')
+        self.backoff_base = scraper_setting('BACKOFF_BASE')
+        self.backoff_max = scraper_setting('BACKOFF_MAX')
+        self._responses = {}
+        self._limiters = {}
+
+        cache_dir = scraper_setting('HTTP_CACHE_DIR')
+        self.http_cache = None
+        if cache_dir:
+            self.http_cache = HttpCache(
+                cache_dir,
+                ttls=scraper_setting('HTTP_CACHE_TTLS'),
+                max_age=scraper_setting('HTTP_CACHE_MAX_AGE'),
+            )
+
+    async def text(self, url, key=None):
+        # Callers passing the same key share one download, even when their
+        # URLs differ (e.g. one standings page per league)
+        key = key or url
+        task = self._responses.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._download(url))
+            self._responses[key] = task
+        try:
+            text = await asyncio.shield(task)
+        except Exception:
+            # Don't keep failures around, the next caller gets a fresh attempt
+            if self._responses.get(key) is task:
+                del self._responses[key]
+            raise
+        # Downloads that gave up return None, don't share those either
+        if text is None and self._responses.get(key) is task:
+            del self._responses[key]
+        return text
+
+    def forget(self, key):
+        # Drop a response the caller has taken ownership of, so a long run
+        # doesn't keep every page it has ever downloaded in memory
+        self._responses.pop(key, None)
+
+    def _limiter(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._limiters:
+            self._limiters[host] = HostLimiter(self.max_concurrency, self.rate, self.burst)
+        return self._limiters[host]
+
+    def _backoff(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(self.backoff_max, int(retry_after)))
+        return delay
+
+    async def _download(self, url):
+        endpoint = telemetry.endpoint_name(url)
+        cached = self.http_cache.get(url) if self.http_cache else None
+        if cached and self.http_cache.is_fresh(url, cached):
+            telemetry.count(f"http_cache.fresh.{endpoint}")
+            return cached['body']
+        headers = self.http_cache.validators(cached) if cached else {}
+
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                async with self._limiter(url):
+                    # Timed from the request going out, waits for the limiter
+                    # aren't the server's latency
+                    with telemetry.timer(f"fetch.{endpoint}"):
+                        async with self.session.get(url, headers=headers, timeout=self.timeout) as response:
+                            telemetry.count(f"status.{response.status}")
+                            if response.status == 304 and cached:
+                                telemetry.count(f"http_cache.revalidated.{endpoint}")
+                                self.http_cache.touch(url, cached)
+                                return cached['body']
+                            if response.status == 200:
+                                body = await response.text()
+                                telemetry.count(f"bytes.{endpoint}", response.content_length or len(body.encode('utf-8')))
+                                if self.http_cache:
+                                    self.http_cache.set(url, body, response.headers)
+                                return body
+                            if response.status not in RETRY_STATUSES:
+                                print(f"⚠️ Error fetching {url}: {response.status}")
+                                telemetry.count(f"failed.{endpoint}")
+                                return None
+                            reason = response.status
+                            retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                telemetry.count(f"errors.{type(err).__name__}")
+                reason = repr(err)
+
+            if attempt < self.retries:
+                delay = self._backoff(attempt, retry_after)
+                print(f"🔁 Retrying {url} in {delay:.1f}s ({reason})")
+                telemetry.count(f"retries.{endpoint}")
+                await asyncio.sleep(delay)
+
+        print(f"❌ Giving up on {url} after {self.retries + 1} attempts ({reason})")
+        telemetry.count(f"failed.{endpoint}")
+        return None
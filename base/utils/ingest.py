@@ -0,0 +1,292 @@
+import datetime
+import hashlib
+import json
+
+from django.db import transaction
+from django.utils import timezone
+
+from base.cache import bump_ingestion_generation
+from base.models import Fixture, H2HResult, League, MatchData, Team, TeamForm, TeamResult
+from base.utils import telemetry
+from base.utils.parsers import UNKNOWN_LEAGUE
+from base.utils.prompts import insight_fingerprint, parse_score
+from base.utils.stats import batch_stats
+
+
+def content_hash(data):
+    encoded = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+# ======================================================
+# NORMALIZED FIXTURES
+# ======================================================
+RESULT_FIELDS = ('date', 'home', 'away', 'score', 'half_score')
+
+
+def kickoff_datetime(epoch):
+    if epoch is None:
+        return None
+    return datetime.datetime.fromtimestamp(epoch, tz=datetime.timezone.utc)
+
+
+def result_fields(result):
+    return {field: result.get(field, '') for field in RESULT_FIELDS}
+
+
+def h2h_fields(result):
+    goals = parse_score(result.get('score')) or (None, None)
+    return {**result_fields(result), 'home_goals': goals[0], 'away_goals': goals[1]}
+
+
+def team_result_fields(team_name, result):
+    """Result fields plus the score as seen by `team_name`."""
+    fields = result_fields(result)
+    side = {'at_home': fields['home'].strip() == team_name, 'at_away': fields['away'].strip() == team_name}
+    goals = parse_score(fields['score'])
+    if goals is None or not (side['at_home'] or side['at_away']):
+        return {**fields, **side}
+
+    goals_for, goals_against = goals if side['at_home'] else goals[::-1]
+    outcome = 'W' if goals_for > goals_against else 'L' if goals_for < goals_against else 'D'
+    return {**fields, **side, 'goals_for': goals_for, 'goals_against': goals_against, 'outcome': outcome}
+
+
+def team_form(fixture, team, side, results):
+    scored = [result for result in results if result.outcome]
+    form = ''.join(result.outcome for result in scored)
+    return TeamForm(
+        fixture=fixture,
+        team=team,
+        side=side,
+        form=form,
+        played=len(form),
+        wins=form.count('W'),
+        draws=form.count('D'),
+        losses=form.count('L'),
+        goals_for=sum(result.goals_for for result in scored),
+        goals_against=sum(result.goals_against for result in scored),
+        clean_sheets=sum(result.goals_against == 0 for result in scored),
+    )
+
+
+def with_played(row):
+    # The feed has no played column, the standings page used to add it per request
+    try:
+        return {**row, 'played': int(row['w']) + int(row['d']) + int(row['l'])}
+    except (KeyError, TypeError, ValueError):
+        return row
+
+
+def sync_fixtures(rows):
+    """Rebuild the Fixture, TeamResult, TeamForm and H2HResult rows of MatchData rows."""
+    # Matches whose pages came back without team tables can't be shown
+    sides = {}
+    for row in rows:
+        home = (row.data.get('home_team_last_matches') or {}).get('team_name', '').strip()
+        away = (row.data.get('away_team_last_matches') or {}).get('team_name', '').strip()
+        if home and away:
+            sides[row.pk] = (home, away)
+    shown = [row for row in rows if row.pk in sides]
+
+    names = {name for pair in sides.values() for name in pair}
+    Team.objects.bulk_create([Team(name=name) for name in names], ignore_conflicts=True)
+    teams = Team.objects.in_bulk(list(names), field_name='name')
+
+    # The whole batch goes through the baseline model in one go
+    stats = batch_stats([{**row.data, 'team_standings': row.get_standings()} for row in shown])
+
+    Fixture.objects.filter(match_data__in=[row.pk for row in rows]).delete()
+    fixtures = Fixture.objects.bulk_create([
+        Fixture(
+            match_data_id=row.pk,
+            match_id=row.match_id,
+            league_id=row.league_id,
+            league_name=row.data.get('league_name') or '',
+            home=teams[sides[row.pk][0]],
+            away=teams[sides[row.pk][1]],
+            start_time=row.data.get('start_time') or '',
+            kickoff=kickoff_datetime(row.data.get('kickoff')),
+            stats=row_stats,
+        )
+        for row, row_stats in zip(shown, stats)
+    ])
+
+    team_results = []
+    team_forms = []
+    h2h_results = []
+    for row, fixture in zip(shown, fixtures):
+        for side, team in (('home', fixture.home), ('away', fixture.away)):
+            matches = (row.data.get(f'{side}_team_last_matches') or {}).get('matches') or []
+            results = [
+                TeamResult(fixture=fixture, team=team, side=side, position=position, **team_result_fields(team.name, result))
+                for position, result in enumerate(matches)
+            ]
+            team_results += results
+            team_forms.append(team_form(fixture, team, side, results))
+        h2h_results += [
+            H2HResult(fixture=fixture, position=position, **h2h_fields(result))
+            for position, result in enumerate(row.data.get('team_head_to_head') or [])
+        ]
+    TeamResult.objects.bulk_create(team_results)
+    TeamForm.objects.bulk_create(team_forms)
+    H2HResult.objects.bulk_create(h2h_results)
+
+
+# ======================================================
+# DIFF-BASED MATCH WRITER
+# ======================================================
+class MatchWriter:
+    """Upserts scraped matches into MatchData by match_id.
+
+    Each batch is diffed against the stored content hashes inside one
+    transaction: new matches are bulk created, changed ones bulk updated
+    and unchanged rows are left alone. Rows whose match is no longer on
+    today's list (see `keep`) are removed by `delete_stale` at the end of
+    the run, so readers never see an empty or half-filled feed.
+
+    Standings are saved once per league into League and the match rows
+    point at them instead of carrying their own copy, unless the match
+    came with a different table than the rest of its league. New and
+    changed rows also get their normalized Fixture rows rebuilt and a new
+    insight fingerprint, which retires their MatchInsight only when the
+    summary the model sees has changed. A new league table changes every
+    row of the league, including rows no batch of this run mentions.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.leagues = {}
+        self.changed_leagues = set()
+        self.refreshed = set()
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.deleted = 0
+
+    def save_leagues(self, matches):
+        tables = {
+            match['league_name']: match['team_standings']
+            for match in matches
+            if match['league_name'] != UNKNOWN_LEAGUE and match['league_name'] not in self.leagues
+        }
+        if not tables:
+            return
+
+        existing = League.objects.in_bulk(list(tables), field_name='name')
+        saved = False
+        for name, standings in tables.items():
+            digest = content_hash(standings)
+            league = existing.get(name)
+            if league is None:
+                league = League.objects.create(name=name, standings=standings, content_hash=digest)
+                saved = True
+            elif league.content_hash != digest:
+                league.standings = standings
+                league.content_hash = digest
+                league.save(update_fields=['standings', 'content_hash', 'updated_at'])
+                self.changed_leagues.add(league.pk)
+                saved = True
+            self.leagues[name] = league
+        # The standings pages read the league row, cached copies are stale
+        # once it is committed
+        if saved:
+            transaction.on_commit(bump_ingestion_generation)
+
+    def refresh_league_rows(self, league_ids, exclude):
+        """Rebuild the fixtures and insight fingerprints of stored rows whose
+        league table changed.
+
+        Rows of this batch are rebuilt by `write` itself, later batches
+        skip the rows refreshed here.
+        """
+        rows = list(
+            MatchData.objects.filter(league__in=league_ids).exclude(match_id__in=exclude).select_related('league')
+        )
+        for row in rows:
+            row.insight_fingerprint = insight_fingerprint({**row.data, 'team_standings': row.get_standings()})
+        if rows:
+            MatchData.objects.bulk_update(rows, ['insight_fingerprint'])
+            sync_fixtures(rows)
+        self.refreshed.update(row.match_id for row in rows)
+        return len(rows)
+
+    def write(self, matches):
+        now = timezone.now()
+
+        with telemetry.timer('db.write'), transaction.atomic():
+            changed = set(self.changed_leagues)
+            self.save_leagues(matches)
+            changed = self.changed_leagues - changed
+
+            incoming = {}
+            for match in matches:
+                fingerprint = insight_fingerprint(match)
+                league = self.leagues.get(match['league_name'])
+                # A match from another group of the same competition keeps
+                # its own table
+                if league is not None and league.content_hash == content_hash(match['team_standings']):
+                    match = {key: value for key, value in match.items() if key != 'team_standings'}
+                else:
+                    league = None
+                incoming[match['match_id']] = (match, league, fingerprint)
+
+            existing = {
+                row.match_id: row
+                for row in MatchData.objects.filter(match_id__in=incoming).only('id', 'match_id', 'content_hash', 'league')
+            }
+
+            to_create = []
+            to_update = []
+            for match_id, (match, league, fingerprint) in incoming.items():
+                digest = content_hash(match)
+                row = existing.get(match_id)
+                if row is None:
+                    to_create.append(MatchData(
+                        match_id=match_id, data=match, content_hash=digest, league=league,
+                        insight_fingerprint=fingerprint, created_at=now,
+                    ))
+                elif (
+                    row.content_hash != digest
+                    or row.league_id != (league and league.pk)
+                    # The row itself is the same but its league's table isn't
+                    or (league is not None and league.pk in self.changed_leagues and match_id not in self.refreshed)
+                ):
+                    row.data = match
+                    row.content_hash = digest
+                    row.league = league
+                    row.insight_fingerprint = fingerprint
+                    row.created_at = now
+                    to_update.append(row)
+                else:
+                    self.unchanged += 1
+
+            MatchData.objects.bulk_create(to_create)
+            MatchData.objects.bulk_update(to_update, ['data', 'content_hash', 'league', 'insight_fingerprint', 'created_at'])
+            with telemetry.timer('db.sync_fixtures'):
+                sync_fixtures(to_create + to_update)
+                refreshed = self.refresh_league_rows(changed, incoming) if changed else 0
+
+        self.created += len(to_create)
+        self.updated += len(to_update) + refreshed
+        self.seen.update(incoming)
+        if to_create or to_update or refreshed:
+            bump_ingestion_generation()
+
+    def keep(self, match_ids):
+        """Protect listed matches from `delete_stale`, written or not.
+
+        A match that is still listed but was dropped this run (a page
+        timed out, no standings yet) keeps its previous row.
+        """
+        self.seen.update(match_ids)
+
+    def delete_stale(self):
+        with telemetry.timer('db.delete_stale'), transaction.atomic():
+            _, per_model = MatchData.objects.exclude(match_id__in=self.seen).delete()
+            # delete() also counts the fixtures, results and insights that cascade
+            self.deleted = per_model.get('base.MatchData', 0)
+            League.objects.filter(matches__isnull=True).delete()
+        if self.deleted:
+            bump_ingestion_generation()
+        return self.deleted
@@ -0,0 +1,165 @@
+import asyncio
+import datetime
+import hashlib
+import random
+
+from asgiref.sync import sync_to_async
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from base.models import InsightCacheEntry, MatchData, MatchInsight
+from base.utils.ai import generate_prediction, insight_setting, make_client
+from base.utils.prompts import estimate_tokens, prediction_prompt
+
+
+RETRY_CODES = {429, 500, 502, 503, 504}
+
+
+def insight_key(prompt):
+    """Address an insight by everything that decides its text."""
+    encoded = f"{insight_setting('MODEL')}\n{prompt}".encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+# ======================================================
+# RESULT CACHE
+# ======================================================
+def cached_insights(keys):
+    entries = dict(InsightCacheEntry.objects.filter(key__in=keys).values_list('key', 'text'))
+    if entries:
+        InsightCacheEntry.objects.filter(key__in=entries).update(last_used_at=timezone.now())
+    return entries
+
+
+def store_insight(key, text):
+    InsightCacheEntry.objects.update_or_create(key=key, defaults={'text': text})
+
+
+def evict_insight_cache():
+    """Drop entries unused for CACHE_MAX_AGE, then the least recently used
+    ones above CACHE_MAX_ENTRIES."""
+    cutoff = timezone.now() - datetime.timedelta(seconds=insight_setting('CACHE_MAX_AGE'))
+    deleted, _ = InsightCacheEntry.objects.filter(last_used_at__lt=cutoff).delete()
+
+    overflow = InsightCacheEntry.objects.order_by('-last_used_at').values_list('pk', flat=True)[
+        insight_setting('CACHE_MAX_ENTRIES'):
+    ]
+    extra, _ = InsightCacheEntry.objects.filter(pk__in=list(overflow)).delete()
+    return deleted + extra
+
+
+def prune_match_insights():
+    """Drop insights whose match has new inputs, and those of matches that
+    left the feed more than CACHE_MAX_AGE ago."""
+    listed = MatchData.objects.filter(match_id=OuterRef('match_id'))
+    current = listed.filter(insight_fingerprint=OuterRef('fingerprint'))
+    cutoff = timezone.now() - datetime.timedelta(seconds=insight_setting('CACHE_MAX_AGE'))
+
+    retired, _ = MatchInsight.objects.filter(Exists(listed), ~Exists(current)).delete()
+    orphaned, _ = MatchInsight.objects.filter(~Exists(listed), created_at__lt=cutoff).delete()
+    return retired + orphaned
+
+
+def predict(match):
+    """Return the insight for one match, from the cache when we have it."""
+    key = insight_key(prediction_prompt(match))
+    text = cached_insights([key]).get(key)
+    if text is None:
+        text = generate_prediction(match)
+        if text:
+            store_insight(key, text)
+    return text
+
+
+# ======================================================
+# CONCURRENT ENGINE
+# ======================================================
+class InsightEngine:
+    """Generates insights for many matches at once with the async client.
+
+    At most CONCURRENCY requests are in flight, rate limits and server
+    errors are retried with jittered exponential backoff, and matches
+    whose prompts are identical share one request. Every result goes
+    through the InsightCacheEntry table, so an input the model has seen
+    before never costs a second call.
+    """
+
+    def __init__(self, client=None):
+        self.client = client
+        self.model = insight_setting('MODEL')
+        self.semaphore = asyncio.Semaphore(insight_setting('CONCURRENCY'))
+        self.retries = insight_setting('RETRIES')
+        self.backoff_base = insight_setting('BACKOFF_BASE')
+        self.backoff_max = insight_setting('BACKOFF_MAX')
+        self.generated = 0
+        self.cached = 0
+        self.failed = 0
+        self.prompt_tokens = 0
+
+    async def run(self, matches):
+        """Return {match_id: insight} for the matches that got one."""
+        prompts = {match['match_id']: prediction_prompt(match) for match in matches}
+        keys = {match_id: insight_key(prompt) for match_id, prompt in prompts.items()}
+        prompt_by_key = {keys[match_id]: prompt for match_id, prompt in prompts.items()}
+
+        texts = await sync_to_async(cached_insights)(list(prompt_by_key))
+        self.cached += len(texts)
+
+        missing = [key for key in prompt_by_key if key not in texts]
+        # A client's async session belongs to the loop it was opened on, a
+        # later asyncio.run in the same worker can't reuse it
+        owned = self.client is None
+        if owned and missing:
+            self.client = make_client()
+        try:
+            results = await asyncio.gather(*(self.generate(prompt_by_key[key]) for key in missing))
+        finally:
+            if owned and self.client is not None:
+                await self.client.aio.aclose()
+                self.client = None
+        for key, text in zip(missing, results):
+            if text is not None:
+                texts[key] = text
+
+        return {match_id: texts[key] for match_id, key in keys.items() if key in texts}
+
+    async def generate(self, prompt):
+        try:
+            return await self.request(prompt)
+        except Exception as err:
+            # One broken prompt mustn't take the rest of the matchday with it
+            print(f"❌ Insight failed: {err!r}")
+            self.failed += 1
+            return None
+
+    async def request(self, prompt):
+        from google.genai import errors
+
+        async with self.semaphore:
+            for attempt in range(self.retries + 1):
+                try:
+                    response = await self.client.aio.models.generate_content(model=self.model, contents=prompt)
+                    break
+                except errors.APIError as err:
+                    if err.code not in RETRY_CODES or attempt == self.retries:
+                        print(f"❌ Insight failed ({err.code}): {err}")
+                        self.failed += 1
+                        return None
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                    print(f"🔁 Gemini returned {err.code}, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
+        # Keep the text before anything else can go wrong with the response
+        text = response.text
+        if text:
+            await sync_to_async(store_insight)(insight_key(prompt), text)
+
+        # The API may leave usage (or just its count) out
+        usage = response.usage_metadata
+        self.prompt_tokens += (usage and usage.prompt_token_count) or estimate_tokens(prompt)
+        if not text:
+            print("❌ Insight failed: empty response")
+            self.failed += 1
+            return None
+        self.generated += 1
+        return text
@@ -0,0 +1,136 @@
+import json
+import re
+
+import lxml.html
+from lxml.etree import ParserError
+
+from base.utils.telemetry import timed
+
+
+# Every page is parsed exactly once with lxml. The XPath expressions below
+# mirror the BeautifulSoup lookups the scraper used before: exact class
+# strings where bs4 was given "a b", class tokens where it was given "a".
+
+LISTING_XPATH = '//a[@class="m meven" or @class="m modd"]'
+LEAGUE_HEADER_XPATH = '//div[@class="detayHeader aic"]'
+RESULT_ROW_CLASSES = ("sm_m sm_sncL", "sm_m sm_sncW", "sm_m sm_sncD")
+UNKNOWN_LEAGUE = "Unknown League"
+
+
+def has_class(name):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+def parse_document(html):
+    if not html:
+        return None
+    try:
+        return lxml.html.document_fromstring(html)
+    except ParserError:
+        return None
+
+
+def text_of(element):
+    return element.text_content().strip()
+
+
+def parse_result_rows(rows):
+    matches = []
+    for row in rows:
+        cols = row.findall('.//td')
+        if len(cols) < 5:
+            continue
+        matches.append({
+            "date": text_of(cols[0]),
+            "home": text_of(cols[1]),
+            "score": text_of(cols[2]),
+            "away": text_of(cols[3]),
+            "half_score": text_of(cols[4]),
+        })
+    return matches
+
+
+# ======================================================
+# TODAY'S MATCHES
+# ======================================================
+@timed('parse.homepage')
+def parse_today_matches(html):
+    doc = parse_document(html)
+    if doc is None:
+        return []
+
+    matches = []
+    for tag in doc.xpath(LISTING_XPATH):
+        matches.append({
+            "match_id": tag.get("mid"),
+            "team": {
+                "home": text_of(tag.find('.//t1')),
+                "away": text_of(tag.find('.//t2')),
+            },
+            "start_time": tag.get("start-time"),
+        })
+    return matches
+
+
+# ======================================================
+# LEAGUE NAME
+# ======================================================
+@timed('parse.event')
+def parse_league_name(html):
+    doc = parse_document(html)
+    if doc is None:
+        return UNKNOWN_LEAGUE
+    header = doc.xpath(LEAGUE_HEADER_XPATH)
+    return text_of(header[0]) if header else UNKNOWN_LEAGUE
+
+
+# ======================================================
+# TEAM LAST MATCHES
+# ======================================================
+def parse_team_table(table, match_id):
+    team_name = table.xpath(f'.//th[{has_class("lm_h1")}]')[0].findall('.//span')[0].text_content()
+    rows = table.xpath('.//tr[' + ' or '.join(f'@class="{c}"' for c in RESULT_ROW_CLASSES) + ']')
+    return {
+        "match_id": match_id,
+        "team_name": team_name,
+        "matches": parse_result_rows(rows),
+    }
+
+
+@timed('parse.last_matches')
+def parse_last_matches(html, match_id):
+    """Return the (home, away) last-matches tables from one page."""
+    doc = parse_document(html)
+    if doc is None:
+        return {}, {}
+
+    sides = []
+    for class_name in ("lm_home", "lm_away"):
+        table = doc.xpath(f'//div[{has_class(class_name)}]')
+        sides.append(parse_team_table(table[0], match_id) if table else {})
+    return tuple(sides)
+
+
+# ======================================================
+# HEAD TO HEAD
+# ======================================================
+@timed('parse.h2h')
+def parse_head_to_head(html):
+    doc = parse_document(html)
+    if doc is None:
+        return []
+    return parse_result_rows(doc.xpath(f'//tr[{has_class("sm_m")}]'))
+
+
+# ======================================================
+# LEAGUE TABLE
+# ======================================================
+STDATA_PATTERN = re.compile(r"var stdata\s*=\s*(\{.*?\});?\s*function", re.DOTALL)
+
+
+@timed('parse.standings')
+def extract_stdata(html):
+    match = STDATA_PATTERN.search(html)
+    if match:
+        return json.loads(match.group(1))
+    return {}
@@ -0,0 +1,88 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+
+from base.utils.fetcher import scraper_setting
+
+
+_DONE = object()
+
+
+# ======================================================
+# STREAMING FETCH -> PARSE -> PERSIST PIPELINE
+# ======================================================
+async def run_pipeline(items, fetch_item, parse_item, write_batch):
+    """Stream items through fetch, parse and write stages.
+
+    `fetch_item` is a coroutine returning the raw pages for one item,
+    `parse_item` is a plain function run in a thread pool so parsing never
+    blocks the event loop, and `write_batch` is a plain function called
+    with lists of parsed results as soon as a batch is full. Bounded queues
+    between the stages keep at most a few batches of pages in memory no
+    matter how many items there are. Returns the number of written results.
+    """
+    fetch_workers = scraper_setting('FETCH_WORKERS')
+    parse_workers = scraper_setting('PARSE_WORKERS')
+    batch_size = scraper_setting('BATCH_SIZE')
+    queue_size = scraper_setting('QUEUE_SIZE')
+
+    pending = asyncio.Queue()
+    for item in items:
+        pending.put_nowait(item)
+    raw_pages = asyncio.Queue(maxsize=queue_size)
+    parsed = asyncio.Queue(maxsize=queue_size)
+
+    loop = asyncio.get_running_loop()
+    write = sync_to_async(write_batch)
+
+    async def fetcher():
+        while not pending.empty():
+            item = pending.get_nowait()
+            await raw_pages.put((item, await fetch_item(item)))
+
+    async def parser():
+        while True:
+            job = await raw_pages.get()
+            if job is _DONE:
+                return
+            result = await loop.run_in_executor(executor, parse_item, *job)
+            if result is not None:
+                await parsed.put(result)
+
+    async def writer():
+        written = 0
+        batch = []
+        while True:
+            result = await parsed.get()
+            if result is not _DONE:
+                batch.append(result)
+            if batch and (result is _DONE or len(batch) >= batch_size):
+                await write(batch)
+                written += len(batch)
+                batch = []
+            if result is _DONE:
+                return written
+
+    async def close(workers, queue, count):
+        await asyncio.gather(*workers)
+        for _ in range(count):
+            await queue.put(_DONE)
+
+    async def drain():
+        await close(fetchers, raw_pages, parse_workers)
+        await close(parsers, parsed, 1)
+
+    with ThreadPoolExecutor(max_workers=parse_workers) as executor:
+        fetchers = [asyncio.ensure_future(fetcher()) for _ in range(fetch_workers)]
+        parsers = [asyncio.ensure_future(parser()) for _ in range(parse_workers)]
+        writer_task = asyncio.ensure_future(writer())
+        try:
+            # gather fails fast, so a broken writer can't leave the
+            # fetchers blocked on a full queue
+            _, written = await asyncio.gather(drain(), writer_task)
+            return written
+        except BaseException:
+            for task in fetchers + parsers + [writer_task]:
+                task.cancel()
+            raise
@@ -0,0 +1,200 @@
+import hashlib
+import re
+
+
+# The model only needs the numbers a pundit would quote, not the scraped
+# tables. Everything here is derived from the match dict alone and sorted
+# the same way every time, so one match always gives the same prompt.
+
+FORM_LENGTH = 10
+H2H_LENGTH = 10
+SCORE_PATTERN = re.compile(r'(\d+)\s*[-:]\s*(\d+)')
+
+
+def parse_score(score):
+    match = SCORE_PATTERN.search(score or '')
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def estimate_tokens(text):
+    # Close enough to Gemini's tokenizer for English text and numbers
+    return (len(text) + 3) // 4
+
+
+# ======================================================
+# TEAM FORM
+# ======================================================
+def team_form(team_name, matches):
+    """Return W/D/L letters (newest first) and goals for/against."""
+    form = []
+    scored = conceded = 0
+    for result in matches[:FORM_LENGTH]:
+        score = parse_score(result.get('score'))
+        if score is None:
+            continue
+        if result.get('home', '').strip() == team_name:
+            goals_for, goals_against = score
+        elif result.get('away', '').strip() == team_name:
+            goals_against, goals_for = score
+        else:
+            continue
+        scored += goals_for
+        conceded += goals_against
+        form.append('W' if goals_for > goals_against else 'L' if goals_for < goals_against else 'D')
+    return ''.join(form), scored, conceded
+
+
+def form_line(team):
+    team_name = (team or {}).get('team_name', '').strip()
+    form, scored, conceded = team_form(team_name, (team or {}).get('matches') or [])
+    if not form:
+        return f"{team_name}: no recent results"
+    return f"{team_name} last {len(form)} (newest first): {form}, goals {scored}-{conceded}"
+
+
+# ======================================================
+# HEAD TO HEAD
+# ======================================================
+def h2h_line(home, away, results):
+    home_wins = draws = away_wins = home_goals = away_goals = played = 0
+    for result in results[:H2H_LENGTH]:
+        score = parse_score(result.get('score'))
+        if score is None:
+            continue
+        if result.get('home', '').strip() == home:
+            home_score, away_score = score
+        elif result.get('home', '').strip() == away:
+            away_score, home_score = score
+        else:
+            continue
+        played += 1
+        home_goals += home_score
+        away_goals += away_score
+        if home_score > away_score:
+            home_wins += 1
+        elif home_score < away_score:
+            away_wins += 1
+        else:
+            draws += 1
+    if not played:
+        return "Head to head: no previous meetings"
+    return (
+        f"Head to head last {played}: {home} {home_wins} wins, {draws} draws, "
+        f"{away} {away_wins} wins, goals {home_goals}-{away_goals}"
+    )
+
+
+# ======================================================
+# LEAGUE TABLE
+# ======================================================
+def table_line(team_name, standings):
+    rows = standings if isinstance(standings, list) else []
+    for row in rows:
+        if str(row.get('team', '')).strip() != team_name:
+            continue
+        try:
+            won, drawn, lost = int(row['w']), int(row['d']), int(row['l'])
+            return (
+                f"{team_name}: position {row['pos']} of {len(rows)}, {row['po']} pts from "
+                f"{won + drawn + lost} (W{won} D{drawn} L{lost}), goals {row['gf']}-{row['ga']}"
+            )
+        except (KeyError, TypeError, ValueError):
+            break
+    return f"{team_name}: not in the league table"
+
+
+# ======================================================
+# MATCH SUMMARY
+# ======================================================
+def match_summary(match):
+    """Condense a scraped match into the few lines the prompt needs."""
+    home_team = match.get('home_team_last_matches') or {}
+    away_team = match.get('away_team_last_matches') or {}
+    home = home_team.get('team_name', '').strip()
+    away = away_team.get('team_name', '').strip()
+    standings = match.get('team_standings') or []
+
+    return '\n'.join([
+        f"{home} (home) vs {away} (away), {match.get('league_name', '')}, kick-off {match.get('start_time', '')}",
+        form_line(home_team),
+        form_line(away_team),
+        h2h_line(home, away, match.get('team_head_to_head') or []),
+        table_line(home, standings),
+        table_line(away, standings),
+    ])
+
+
+def insight_fingerprint(match):
+    # Changes exactly when the prompt's inputs do: form, H2H or table rows
+    return hashlib.sha256(match_summary(match).encode('utf-8')).hexdigest()
+
+
+# ======================================================
+# PREDICTION PROMPT
+# ======================================================
+def baseline_line(stats):
+    probabilities = stats['probabilities']
+    return (
+        f"Poisson baseline: home {probabilities['home']:.0%}, draw {probabilities['draw']:.0%}, "
+        f"away {probabilities['away']:.0%}, over 2.5 {probabilities['over_2_5']:.0%}, "
+        f"both score {probabilities['both_score']:.0%}, most likely {stats['likely_score']}"
+    )
+
+
+def prediction_prompt(match):
+    from base.utils.stats import match_stats
+
+    return f"""
+    You are a football match prediction assistant.
+    Use this match summary to predict the likely outcome of the match.
+    Form letters are W (win), D (draw) and L (loss), goals are for-against.
+
+    {match_summary(match)}
+    {baseline_line(match_stats(match))}
+
+    Your prediction must be in one of these formats:
+
+    Home win
+
+    Away win
+
+    Home win or draw
+
+    Away win or draw
+
+    Over or under X goals
+
+    Assign a confidence score out of 100.
+
+    Then provide clear, insightful reasoning behind the prediction.
+
+    Tone & Style Guidelines:
+
+    Write in a balanced tone — part sports journalist, part data analyst.
+
+    Keep the writing natural, engaging, and factual.
+
+    Avoid robotic phrasing and generic introductions like “Based on the data.”
+
+    Use short clear section headings in uppercase and bold.
+
+    The response should feel like a match preview written by an expert analyst.
+
+    Response Structure Example:
+
+    Prediction: Away win or draw
+    Confidence Score: 75/100
+
+    INSIGHTS:
+    RECENT MATCHES: Watford’s form has been inconsistent, mixing solid wins with disappointing defeats. West Brom, meanwhile, look sharper, recording victories over Preston and Norwich City while holding Leicester to a draw. The visitors appear more composed and confident in recent weeks.
+
+    RECENT FORM: Watford’s tendency to alternate between wins and losses shows a team still searching for rhythm. West Brom have displayed greater stability, balancing attack and defense effectively, which often makes the difference in tight fixtures.
+
+    HEAD-TO-HEAD: Encounters between these sides have historically been close, but West Brom have edged the recent meetings, winning two of the last three. That momentum gives them a psychological advantage heading into this clash.
+
+    SUMMARY: Watford’s home support could play a role, but West Brom’s current consistency and recent dominance suggest they are more likely to avoid defeat. An away win or draw looks the sensible prediction.
+
+    
+    """
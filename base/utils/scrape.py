@@ -1,19 +1,22 @@
 import asyncio
 import aiohttp
-from bs4 import BeautifulSoup
-import json
-import re
-from dotenv import load_dotenv
-from ollama import Client
-from ollama import chat, ChatResponse
-from base.models import MatchData
 from django.utils import timezone
 import datetime
-from google import genai
+from base.utils import telemetry
+from base.utils.fetcher import FetchSession, scraper_setting
+from base.utils.ingest import MatchWriter, with_played
+from base.utils.parsers import (
+    UNKNOWN_LEAGUE,
+    extract_stdata,
+    parse_head_to_head,
+    parse_last_matches,
+    parse_league_name,
+    parse_today_matches,
+)
+from base.utils.pipeline import run_pipeline
+from base.tasks import enqueue_upcoming_insights
 
 
-load_dotenv()
-
 HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -23,160 +26,99 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.9",
 }
 
-api_key = os.getenv("GEMINI_API_KEY")
-
-client = Client()
-client = genai.Client(api_key=api_key)
-
-
 
 # ======================================================
 # HELPER: Fetch page text asynchronously
 # ======================================================
-async def fetch(session, url):
-    async with session.get(url) as response:
-        if response.status != 200:
-            print(f"⚠️ Error fetching {url}: {response.status}")
-            return None
-        return await response.text()
+async def fetch(session, url, key=None):
+    # session is a FetchSession, so repeated URLs (or keys) within a run are
+    # downloaded once and shared between callers
+    return await session.text(url, key=key)
 
 
 # ======================================================
 # GET TODAY'S MATCHES
 # ======================================================
 async def get_today_matches(session):
-    url = "https://www.livescore.bz/en/"
+    url = f"{scraper_setting('BASE_URL')}/en/"
     html = await fetch(session, url)
-    if not html:
-        return []
-
-    soup = BeautifulSoup(html, "html.parser")
-    match_tags = soup.find_all("a", class_=["m meven", "m modd"])
-
-    matches = []
-    for tag in match_tags:
-        match_id = tag.get("mid")
-        home_team = tag.find("t1").get_text(strip=True)
-        away_team = tag.find("t2").get_text(strip=True)
-        start_time = tag.get("start-time")
-
-        matches.append({
-            "match_id": match_id,
-            "team": {"home": home_team, "away": away_team},
-            "start_time": start_time,
-        })
+    matches = parse_today_matches(html)
 
     # print(f"✅ Found {len(matches)} matches today.")
     return matches
 
 
-async def get_start_time(session, match_id):
-    matches = await get_today_matches(session)
-
-    match_start_time = None
+def get_kickoff(match):
+    # start-time comes from the listing we already parsed, no need to
+    # download the homepage again for every match
+    if not match.get('start_time'):
+        return None
+    return int(match['start_time'])
 
-    for match in matches:
-        id = match['match_id']
-        if id == match_id:
-            start_time = int(match['start_time'])
-            time_str = datetime.datetime.fromtimestamp(start_time).strftime("%Y-%m-%d %H:%M").split(' ')[1]
-            match_start_time = time_str
-            break
-    return match_start_time
 
-    
+def get_start_time(match):
+    kickoff = get_kickoff(match)
+    if kickoff is None:
+        return None
+    kickoff = datetime.datetime.fromtimestamp(kickoff, tz=datetime.timezone.utc)
+    return timezone.localtime(kickoff).strftime("%H:%M")
 
 
 # ======================================================
-# LEAGUE NAME
+# MATCH PAGES
 # ======================================================
-async def get_league_name(session, match_id):
-    url = f"https://www.livescore.bz/en/football/event/{match_id}/"
-    html = await fetch(session, url)
-    if not html:
-        return "Unknown League"
-    soup = BeautifulSoup(html, "html.parser")
-    header = soup.find("div", class_="detayHeader aic")
-    return header.text.strip() if header else "Unknown League"
+def match_page_urls(match_id):
+    base_url = scraper_setting('BASE_URL')
+    return {
+        "event": f"{base_url}/en/football/event/{match_id}/",
+        "last_matches": f"{base_url}/last_matches_2018.cache?id={match_id}&filter=overall&team=all&lang=en",
+        "h2h": f"{base_url}/h2h_2018.cache?id={match_id}&filter=overall&team=all&lang=en",
+        "standings": f"{base_url}/standings_2020.cache?lang=en&id={match_id}&filter=",
+    }
 
 
-# ======================================================
-# TEAM LAST MATCHES
-# ======================================================
-async def get_team_last_matches(session, match_id, class_name):
-    url = f"https://www.livescore.bz/last_matches_2018.cache?id={match_id}&filter=overall&team=all&lang=en"
-    html = await fetch(session, url)
-    if not html:
-        return {}
+async def fetch_match_pages(session, match):
+    urls = match_page_urls(match["match_id"])
 
-    soup = BeautifulSoup(html, "html.parser")
-    find_element = soup.find("div", class_=class_name)
-    if not find_element:
-        return {}
+    async def fetch_league_pages():
+        event = await fetch(session, urls["event"])
+        league_name = await asyncio.to_thread(parse_league_name, event)
+        if league_name == UNKNOWN_LEAGUE:
+            return league_name, await fetch(session, urls["standings"])
 
-    home_team_name = find_element.find("th", class_="lm_h1").find_all("span")[0].text
-    rows = find_element.find_all("tr", class_=["sm_m sm_sncL", "sm_m sm_sncW", "sm_m sm_sncD"])
-
-    matches = []
-    for row in rows:
-        cols = row.find_all("td")
-        if len(cols) < 5:
-            continue
-        matches.append({
-            "date": cols[0].text.strip(),
-            "home": cols[1].text.strip(),
-            "score": cols[2].text.strip(),
-            "away": cols[3].text.strip(),
-            "half_score": cols[4].text.strip(),
-        })
+        # Every match of a league usually shows the same table, so only the
+        # first match of each league downloads it. Cups and group stages can
+        # have several tables under one name, fall back to the match's own
+        # page when the shared one doesn't list either team or didn't arrive.
+        standings = await fetch(session, urls["standings"], key=("standings", league_name))
+        if not standings or not any(team in standings for team in match["team"].values()):
+            standings = await fetch(session, urls["standings"])
+        return league_name, standings
 
-    return {
-        "match_id": match_id,
-        "team_name": home_team_name,
-        "matches": matches,
-    }
+    # Run all fetches concurrently for this match
+    (league_name, standings), last_matches, h2h = await asyncio.gather(
+        fetch_league_pages(),
+        fetch(session, urls["last_matches"]),
+        fetch(session, urls["h2h"]),
+    )
 
+    # The parser owns the pages from here, don't keep them in the run cache.
+    # League tables stay, the next match of the league reuses them.
+    for key in (urls["event"], urls["last_matches"], urls["h2h"], urls["standings"]):
+        session.forget(key)
 
-# ======================================================
-# HEAD TO HEAD
-# ======================================================
-async def get_head_to_head(session, match_id):
-    url = f"https://www.livescore.bz/h2h_2018.cache?id={match_id}&filter=overall&team=all&lang=en"
-    html = await fetch(session, url)
-    if not html:
-        return []
-    soup = BeautifulSoup(html, "html.parser")
-
-    rows = soup.find_all("tr", class_="sm_m")
-    h2h_matches = []
-    for row in rows:
-        cols = row.find_all("td")
-        if len(cols) < 5:
-            continue
-        h2h_matches.append({
-            "date": cols[0].text.strip(),
-            "home": cols[1].text.strip(),
-            "score": cols[2].text.strip(),
-            "away": cols[3].text.strip(),
-            "half_score": cols[4].text.strip(),
-        })
-    return h2h_matches
+    return {
+        "league_name": league_name,
+        "last_matches": last_matches,
+        "h2h": h2h,
+        "standings": standings,
+    }
 
 
 # ======================================================
 # LEAGUE TABLE
 # ======================================================
-def extract_stdata(html):
-    pattern = r"var stdata\s*=\s*(\{.*?\});?\s*function"
-    match = re.search(pattern, html, re.DOTALL)
-    if match:
-        return json.loads(match.group(1))
-    return {}
-
-
-async def get_league_table(session, match_id):
-    url = f"https://www.livescore.bz/standings_2020.cache?lang=en&id={match_id}&filter="
-    html = await fetch(session, url)
+def parse_league_table(html):
     if not html:
         return {}
     try:
@@ -185,80 +127,143 @@ async def get_league_table(session, match_id):
         return {}
 
 
+def league_table(league_name, html, tables):
+    """parse_league_table, once per page and run.
+
+    Matches of one league share the same page object (see
+    fetch_match_pages), so `tables` is keyed by the page's id. The page is
+    kept next to its table, which keeps the id from being reused within
+    the run. Two threads may both parse a new page, the first one stored wins.
+    """
+    if tables is None:
+        return parse_league_table(html)
+    key = (league_name, id(html))
+    entry = tables.get(key)
+    if entry is None or entry[0] is not html:
+        entry = tables.setdefault(key, (html, parse_league_table(html)))
+    return entry[1]
+
+
 # ======================================================
 # COMBINE ALL DATA PER MATCH
 # ======================================================
-async def process_match(session, match):
+def parse_match_pages(match, pages, tables=None):
     match_id = match["match_id"]
-
-    # Run all fetches concurrently for this match
-    start_time, league_name, home_matches, away_matches, h2h, table = await asyncio.gather(
-        get_start_time(session, match_id),
-        get_league_name(session, match_id),
-        get_team_last_matches(session, match_id, "lm_home"),
-        get_team_last_matches(session, match_id, "lm_away"),
-        get_head_to_head(session, match_id),
-        get_league_table(session, match_id),
-    )
+    # Both teams' tables live on the same page, parse it once for both
+    home_matches, away_matches = parse_last_matches(pages["last_matches"], match_id)
 
     return {
         "match_id": match_id,
-        'start_time' : start_time,
-        "league_name": league_name,
+        'start_time' : get_start_time(match),
+        "kickoff": get_kickoff(match),
+        "league_name": pages["league_name"],
         "home_team_last_matches": home_matches,
         "away_team_last_matches": away_matches,
-        "team_head_to_head": h2h,
-        "team_standings": table,
+        "team_head_to_head": parse_head_to_head(pages["h2h"]),
+        "team_standings": league_table(pages["league_name"], pages["standings"], tables),
     }
 
 
+def clean_match(match):
+    tables = (match['team_standings'].get('overall') or {}).get('tables')
+    if not tables:
+        return None
+
+    match['team_standings'] = [with_played(row) for row in tables[0]['data']]
+    return match
+
+
+@telemetry.timed('parse.match')
+def parse_clean_match(match, pages, tables=None):
+    try:
+        cleaned = clean_match(parse_match_pages(match, pages, tables))
+    except Exception as err:
+        print(f"⚠️ Dropping match {match['match_id']}: {err!r}")
+        # Pages that never arrived are the usual cause, say which
+        missing = [name for name, page in pages.items() if page is None]
+        telemetry.drop(match['match_id'], f"missing {', '.join(missing)}" if missing else type(err).__name__)
+        return None
+    if cleaned is None:
+        print(f"⚠️ Dropping match {match['match_id']}: no standings table")
+        telemetry.drop(match['match_id'], 'no standings table')
+    return cleaned
+
+
 # ======================================================
 # MAIN FUNCTION
 # ======================================================
-async def get_clean_todays_matches_data():
-    async with aiohttp.ClientSession(headers=HEADERS) as session:
+async def ingest_todays_matches(write_batch, on_listing=None):
+    """Stream today's matches to `write_batch` in batches as they finish.
+
+    `on_listing` gets the ids of every listed match before any is fetched.
+    """
+    async with aiohttp.ClientSession(headers=HEADERS) as client_session:
+        session = FetchSession(client_session)
         matches = await get_today_matches(session)
         if not matches:
             print("❌ No matches found.")
-            return []
+            return 0
+        if on_listing:
+            on_listing([match['match_id'] for match in matches])
+
+        print(f"⚙️ Streaming data for {len(matches)} matches...")
+        # League tables parsed this run, dropped with it
+        tables = {}
+        count = await run_pipeline(
+            matches,
+            lambda match: fetch_match_pages(session, match),
+            lambda match, pages: parse_clean_match(match, pages, tables),
+            write_batch,
+        )
 
-        print("⚙️ Fetching all match data concurrently...")
-        tasks = [process_match(session, m) for m in matches]
-        results = await asyncio.gather(*tasks)
+        print(f"✅ Finished processing {count} matches.")
+        return count
 
-        print(f"✅ Finished processing {len(results)} matches.")
-        return results
+
+async def get_clean_todays_matches_data():
+    results = []
+    await ingest_todays_matches(results.extend)
+    return results
 
 
 def cleaned_match_data():
-    matches = asyncio.run(get_clean_todays_matches_data())
-    
-    cleaned_match_data = []
-    for match in matches:
-        if not match['team_standings']['overall']['tables']:
-            continue
-        
-        table = match['team_standings']['overall']['tables'][0]['data']
-        match['team_standings'] = table
-        cleaned_match_data.append(match)
-    return cleaned_match_data
-
-
-def save_match_to_db():
-    matches = cleaned_match_data()
-    db_matches = MatchData.objects.all()
-
-    db_matches.delete()
-
-    for match in matches:
-        id = match['match_id']
-        # start_time = match[]
-        MatchData.objects.create(
-            match_id=match['match_id'],
-            data=match,
-            created_at=datetime.datetime.now()
+    with telemetry.timer('stage.cleaned_match_data'):
+        return asyncio.run(get_clean_todays_matches_data())
+
+
+def save_match_to_db(report_file=None):
+    """Ingest today's matches, returning the run's Telemetry.
+
+    The telemetry report is also written to `report_file` when given.
+    """
+    with telemetry.recording() as run:
+        writer = MatchWriter()
+        with telemetry.timer('stage.ingest'):
+            asyncio.run(ingest_todays_matches(writer.write, writer.keep))
+
+        # Rows of matches that left today's list. Without a list (the
+        # homepage failed) nothing is known to be stale.
+        if writer.seen:
+            writer.delete_stale()
+        print(
+            f"💾 {writer.created} new, {writer.updated} updated, "
+            f"{writer.unchanged} unchanged, {writer.deleted} removed"
         )
-    print('data loaded successfully')
+        print('data loaded successfully')
+
+        # Warm the AI tab before anyone opens it
+        with telemetry.timer('stage.enqueue_insights'):
+            queued = enqueue_upcoming_insights()
+        print(f"🤖 {queued} AI insights queued")
+
+        for name in ('created', 'updated', 'unchanged', 'deleted'):
+            telemetry.count(f"matches.{name}", getattr(writer, name))
+        telemetry.count('insights.queued', queued)
+
+    if report_file:
+        run.write(report_file)
+        print(f"📊 Ingestion report written to {report_file}")
+    return run
 
 
 
@@ -337,70 +342,3 @@ def save_match_to_db():
 
 #     print(f"\nAll batches completed. Total predictions generated: {len(final_match_data)}")
 #     return final_match_data
-
-def generate_prediction(match):
-    content = f"""
-    You are a football match prediction assistant.
-    Use this {match} data to predict the likely outcome of the match.
-
-    Your prediction must be in one of these formats:
-
-    Home win
-
-    Away win
-
-    Home win or draw
-
-    Away win or draw
-
-    Over or under X goals
-
-    Assign a confidence score out of 100.
-
-    Then provide clear, insightful reasoning behind the prediction.
-
-    Tone & Style Guidelines:
-
-    Write in a balanced tone — part sports journalist, part data analyst.
-
-    Keep the writing natural, engaging, and factual.
-
-    Avoid robotic phrasing and generic introductions like “Based on the data.”
-
-    Use short clear section headings in uppercase and bold.
-
-    The response should feel like a match preview written by an expert analyst.
-
-    Response Structure Example:
-
-    Prediction: Away win or draw
-    Confidence Score: 75/100
-
-    INSIGHTS:
-    RECENT MATCHES: Watford’s form has been inconsistent, mixing solid wins with disappointing defeats. West Brom, meanwhile, look sharper, recording victories over Preston and Norwich City while holding Leicester to a draw. The visitors appear more composed and confident in recent weeks.
-
-    RECENT FORM: Watford’s tendency to alternate between wins and losses shows a team still searching for rhythm. West Brom have displayed greater stability, balancing attack and defense effectively, which often makes the difference in tight fixtures.
-
-    HEAD-TO-HEAD: Encounters between these sides have historically been close, but West Brom have edged the recent meetings, winning two of the last three. That momentum gives them a psychological advantage heading into this clash.
-
-    SUMMARY: Watford’s home support could play a role, but West Brom’s current consistency and recent dominance suggest they are more likely to avoid defeat. An away win or draw looks the sensible prediction.
-
-    
-    """
-
-    response = client.models.generate_content(
-    model="gemini-2.5-flash-lite", contents=content
-    )
-    # response: ChatResponse = chat(model='llama3.2:1b', messages=[
-    #     {'role': 'user', 'content': content}
-    # ])
-    # messages = [
-    # {
-    #     'role': 'user',
-    #     'content': content,
-    # }, Write in plain text only (no markdown, no bullet points).
-    # ]
-    # response = client.chat('gpt-oss:120b-cloud', messages=messages)
-    # ai_insight = response['message']['content']
-    ai_insight = response.text
-    return ai_insight
@@ -0,0 +1,160 @@
+import numpy as np
+
+from base.utils.prompts import FORM_LENGTH, H2H_LENGTH, parse_score
+
+
+# A local baseline next to the LLM insight. A day's matches are packed into
+# fixed-size arrays (one row per match, missing results masked out) so every
+# figure below is computed for the whole batch in a handful of NumPy calls.
+
+MAX_GOALS = 10  # Poisson grid is 0..MAX_GOALS goals per side
+PRIOR_GOALS = 1.3  # goals per match assumed for a team without results
+HOME, AWAY = 0, 1
+
+
+# ======================================================
+# PACKING
+# ======================================================
+def result_goals(team_name, results, length):
+    """Goals for/against of `team_name` in its last `length` results."""
+    goals = np.zeros((2, length))
+    mask = np.zeros(length, dtype=bool)
+    slot = 0
+    for result in results:
+        if slot == length:
+            break
+        score = parse_score(result.get('score'))
+        if score is None:
+            continue
+        if result.get('home', '').strip() == team_name:
+            goals[:, slot] = score
+        elif result.get('away', '').strip() == team_name:
+            goals[:, slot] = score[::-1]
+        else:
+            continue
+        mask[slot] = True
+        slot += 1
+    return goals, mask
+
+
+def table_position(team_name, standings):
+    rows = standings if isinstance(standings, list) else []
+    for row in rows:
+        if str(row.get('team', '')).strip() == team_name:
+            try:
+                return int(row['pos']), len(rows)
+            except (KeyError, TypeError, ValueError):
+                break
+    return 0, len(rows)
+
+
+def pack(matches):
+    """Arrays for a batch of matches, see match_stats for the keys used."""
+    count = len(matches)
+    form = np.zeros((count, 2, 2, FORM_LENGTH))  # match, side, for/against, result
+    form_mask = np.zeros((count, 2, FORM_LENGTH), dtype=bool)
+    h2h = np.zeros((count, 2, H2H_LENGTH))  # match, home/away goals, meeting
+    h2h_mask = np.zeros((count, H2H_LENGTH), dtype=bool)
+    table = np.zeros((count, 2, 2))  # match, side, position/table size
+
+    for i, match in enumerate(matches):
+        names = []
+        for side, key in ((HOME, 'home_team_last_matches'), (AWAY, 'away_team_last_matches')):
+            team = match.get(key) or {}
+            name = team.get('team_name', '').strip()
+            names.append(name)
+            form[i, side], form_mask[i, side] = result_goals(name, team.get('matches') or [], FORM_LENGTH)
+            table[i, side] = table_position(name, match.get('team_standings') or [])
+        h2h[i], h2h_mask[i] = result_goals(names[HOME], match.get('team_head_to_head') or [], H2H_LENGTH)
+
+    return form, form_mask, h2h, h2h_mask, table
+
+
+# ======================================================
+# BATCH STATISTICS
+# ======================================================
+def masked_mean(values, mask):
+    played = mask.sum(axis=-1)
+    return np.where(played > 0, (values * mask).sum(axis=-1) / np.maximum(played, 1), 0.0)
+
+
+def poisson_pmf(rates):
+    goals = np.arange(MAX_GOALS + 1)
+    log_factorial = np.cumsum(np.log(np.maximum(goals, 1)))
+    rates = np.maximum(rates, 1e-6)[..., None]
+    return np.exp(goals * np.log(rates) - rates - log_factorial)
+
+
+def batch_stats(matches):
+    """Return one stats dict per match, computed for the whole batch at once."""
+    if not matches:
+        return []
+    form, form_mask, h2h, h2h_mask, table = pack(matches)
+
+    scored, conceded = form[:, :, 0], form[:, :, 1]
+    points = np.where(scored > conceded, 3, np.where(scored == conceded, 1, 0)) * form_mask
+    played = form_mask.sum(axis=-1)
+    scored_rate = masked_mean(scored, form_mask)
+    conceded_rate = masked_mean(conceded, form_mask)
+    over_rate = masked_mean(scored + conceded > 2.5, form_mask)
+    clean_sheet_rate = masked_mean(conceded == 0, form_mask)
+
+    h2h_played = h2h_mask.sum(axis=-1)
+    h2h_home_wins = ((h2h[:, 0] > h2h[:, 1]) & h2h_mask).sum(axis=-1)
+    h2h_draws = ((h2h[:, 0] == h2h[:, 1]) & h2h_mask).sum(axis=-1)
+
+    # Expected goals: a side's scoring rate averaged with what the other
+    # side concedes. Teams without results get a fixed prior, so a match's
+    # numbers never depend on which other matches share its batch.
+    attack = np.where(played > 0, scored_rate, PRIOR_GOALS)
+    defence = np.where(played > 0, conceded_rate, PRIOR_GOALS)
+    expected = (attack + defence[:, ::-1]) / 2
+
+    pmf = poisson_pmf(expected)
+    grid = pmf[:, HOME, :, None] * pmf[:, AWAY, None, :]  # match, home goals, away goals
+    home_goals, away_goals = np.indices(grid.shape[1:])
+    home_win = (grid * (home_goals > away_goals)).sum(axis=(1, 2))
+    draw = (grid * (home_goals == away_goals)).sum(axis=(1, 2))
+    away_win = (grid * (home_goals < away_goals)).sum(axis=(1, 2))
+    over = (grid * (home_goals + away_goals > 2.5)).sum(axis=(1, 2))
+    both_score = (grid * ((home_goals > 0) & (away_goals > 0))).sum(axis=(1, 2))
+    likely = grid.reshape(len(matches), -1).argmax(axis=1)
+
+    results = []
+    for i in range(len(matches)):
+        total = home_win[i] + draw[i] + away_win[i]
+        results.append({
+            'teams': [
+                {
+                    'played': int(played[i, side]),
+                    'form_points': int(points[i, side].sum()),
+                    'goals_for': round(float(scored_rate[i, side]), 2),
+                    'goals_against': round(float(conceded_rate[i, side]), 2),
+                    'over_2_5': round(float(over_rate[i, side]), 2),
+                    'clean_sheets': round(float(clean_sheet_rate[i, side]), 2),
+                    'position': int(table[i, side, 0]),
+                    'table_size': int(table[i, side, 1]),
+                }
+                for side in (HOME, AWAY)
+            ],
+            'h2h': {
+                'played': int(h2h_played[i]),
+                'home_wins': int(h2h_home_wins[i]),
+                'draws': int(h2h_draws[i]),
+                'away_wins': int(h2h_played[i] - h2h_home_wins[i] - h2h_draws[i]),
+            },
+            'expected_goals': [round(float(rate), 2) for rate in expected[i]],
+            'probabilities': {
+                'home': round(float(home_win[i] / total), 3),
+                'draw': round(float(draw[i] / total), 3),
+                'away': round(float(away_win[i] / total), 3),
+                'over_2_5': round(float(over[i]), 3),
+                'both_score': round(float(both_score[i]), 3),
+            },
+            'likely_score': f"{likely[i] // (MAX_GOALS + 1)}-{likely[i] % (MAX_GOALS + 1)}",
+        })
+    return results
+
+
+def match_stats(match):
+    return batch_stats([match])[0]
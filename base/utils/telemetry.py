@@ -0,0 +1,206 @@
+import collections
+import contextlib
+import functools
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+
+# Timings, byte counts, retries and dropped matches of one ingestion run.
+# The scraper, the parsers and the writer report to whichever run is
+# active through the module-level helpers, which do nothing outside a run,
+# so code paths like bench_scrape or the shell pay next to nothing.
+
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+# First URL fragment that matches names the endpoint
+ENDPOINTS = [
+    ('/football/event/', 'event'),
+    ('last_matches_2018.cache', 'last_matches'),
+    ('h2h_2018.cache', 'h2h'),
+    ('standings_2020.cache', 'standings'),
+    ('/en/', 'homepage'),
+]
+
+
+def endpoint_name(url):
+    for fragment, name in ENDPOINTS:
+        if fragment in url:
+            return name
+    return urlsplit(url).path or url
+
+
+def percentile(ordered, share):
+    """Nearest-rank percentile of sorted values, `share` between 0 and 1, 0.0 for no values."""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+class Timing:
+    """Count, total and histogram of the durations recorded under one name."""
+
+    def __init__(self):
+        self.samples = []
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def report(self):
+        ordered = sorted(seconds * 1000 for seconds in self.samples)
+        buckets = collections.Counter()
+        for ms in ordered:
+            bucket = next((f"<={limit}" for limit in HISTOGRAM_BUCKETS_MS if ms <= limit), f">{HISTOGRAM_BUCKETS_MS[-1]}")
+            buckets[bucket] += 1
+        return {
+            'count': len(ordered),
+            'total_ms': round(sum(ordered), 3),
+            'p50_ms': round(percentile(ordered, 0.50), 3),
+            'p95_ms': round(percentile(ordered, 0.95), 3),
+            'p99_ms': round(percentile(ordered, 0.99), 3),
+            'max_ms': round(ordered[-1], 3),
+            'histogram_ms': dict(buckets),
+        }
+
+
+# ======================================================
+# RUN TELEMETRY
+# ======================================================
+class Telemetry:
+    """Everything one ingestion run measured.
+
+    Timings are grouped by dotted names: `fetch.<endpoint>` per HTTP
+    attempt, `parse.<page>` per parsed page, `db.<step>` per write and
+    `stage.<name>` for whole stages. Parsers run on worker threads, so
+    every update takes the lock.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.finished_at = None
+        self.timings = collections.defaultdict(Timing)
+        self.counters = collections.Counter()
+        self.dropped = []
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.timings[name].add(seconds)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def drop(self, match_id, reason):
+        with self._lock:
+            self.dropped.append({'match_id': match_id, 'reason': reason})
+
+    def report(self):
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'seconds': round((self.finished_at or time.time()) - self.started_at, 3),
+                'timings': {name: timing.report() for name, timing in sorted(self.timings.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'dropped': {
+                    'count': len(self.dropped),
+                    'reasons': dict(collections.Counter(drop['reason'] for drop in self.dropped).most_common()),
+                    'matches': list(self.dropped),
+                },
+            }
+
+    def write(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+_active = None
+
+
+@contextlib.contextmanager
+def recording():
+    """Make a new Telemetry the active one for the duration of the block."""
+    global _active
+    previous, _active = _active, Telemetry()
+    try:
+        yield _active
+    finally:
+        _active.finished_at = time.time()
+        _active = previous
+
+
+def record(name, seconds):
+    if _active is not None:
+        _active.record(name, seconds)
+
+
+def count(name, amount=1):
+    if _active is not None:
+        _active.count(name, amount)
+
+
+def drop(match_id, reason):
+    if _active is not None:
+        _active.drop(match_id, reason)
+
+
+@contextlib.contextmanager
+def timer(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator recording every call of a function under `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ======================================================
+# SUMMARY TABLE
+# ======================================================
+def summary_lines(report, prefix=''):
+    """The report as a table, optionally only timings starting with `prefix`."""
+    counters = report['counters']
+    lines = [
+        f"{'timing':<24}{'count':>7}{'total s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        f"{'MiB':>8}{'retries':>9}"
+    ]
+    for name, timing in report['timings'].items():
+        if not name.startswith(prefix):
+            continue
+        downloaded = ''
+        retries = ''
+        if name.startswith('fetch.'):
+            endpoint = name.split('.', 1)[1]
+            downloaded = f"{counters.get(f'bytes.{endpoint}', 0) / 2 ** 20:.2f}"
+            retries = counters.get(f'retries.{endpoint}', 0)
+        lines.append(
+            f"{name:<24}{timing['count']:>7}{timing['total_ms'] / 1000:>9.2f}{timing['p50_ms']:>9.1f}"
+            f"{timing['p95_ms']:>9.1f}{timing['p99_ms']:>9.1f}{timing['max_ms']:>9.1f}{downloaded:>8}{retries:>9}"
+        )
+
+    dropped = report['dropped']
+    if not prefix:
+        # Bytes and retries are already in the fetch rows
+        for name, value in counters.items():
+            if not name.startswith(('bytes.', 'retries.')):
+                lines.append(f"{name:<24}{value:>7}")
+
+        lines.append(f"run took {report['seconds']:.1f}s, {dropped['count']} matches dropped")
+        lines += [f"  {total:>5}  {reason}" for reason, total in dropped['reasons'].items()]
+    return lines
@@ -1,196 +1,262 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from base.utils.scrape import generate_prediction
-from base.models import MatchData
+import asyncio
+import functools
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, aget_object_or_404
+from base.cache import cache_per_ingestion
+from base.models import Fixture, MatchData, MatchInsight, TeamResult
+from base.tasks import enqueue_insight, ready_key
+from django.core.cache import cache
+from django.conf import settings
+from django.views.decorators.http import condition
+from django.db.models import F, Q
 from django.utils import timezone
 import datetime
-from django.http import HttpResponseServerError
-from django.contrib import messages
-from zoneinfo import ZoneInfo
 from datetime import timedelta
 
 
 
-# Create your views here.
-def feed(request):
-    lagos_tz = ZoneInfo("Africa/Lagos")
-    now = timezone.now().astimezone(lagos_tz)
-    current_time = now.time()
-
-    matches = MatchData.objects.all()
-
-    def parse_start_time(match):
-        """Safely parse and return today's datetime for the match start."""
-        start_str = match.data.get('start_time')
-        if not start_str:
-            return datetime.datetime.max  # Put matches without time at the end
-        try:
-            start_dt = datetime.datetime.strptime(start_str, "%H:%M")
-            # Combine today's date + start time in Lagos timezone
-            start_dt_today = datetime.datetime.combine(now.date(), start_dt.time(), tzinfo=lagos_tz)
-            return start_dt_today
-        except Exception as e:
-            print(f"Error parsing start_time for match {match.match_id}: {e}")
-            return datetime.datetime.max
-
-    # Sort matches by how close their start time is to "now"
-    sorted_matches = sorted(
-        matches,
-        key=lambda m: (parse_start_time(m) - now).total_seconds() if parse_start_time(m) > now else float('inf')
-    )
-
-    # Optionally, bring matches starting within the next hour to the top
-    sorted_matches = sorted(
-        sorted_matches,
-        key=lambda m: abs((parse_start_time(m) - now).total_seconds() - 3600)
-    )
-
-    # Debug output
-    for match in sorted_matches:
-        start_dt = parse_start_time(match)
-        if start_dt != datetime.datetime.max:
-            pass
-            # print(f"{match.match_id} -> starts at {start_dt.time()}")
-
-    return render(request, "base/feed.html", {"matches": sorted_matches})
-
-
-
-def match_details(request, match_id):
-    game_details = MatchData.objects.get(match_id=match_id)
-
-    data = game_details.data or {}
+FEED_PAGE_SIZE = 50
+INSIGHT_WAIT_INTERVAL = 0.25  # seconds between checks while waiting for an insight
+UPCOMING = 'u'
+STARTED = 's'
+UNSCHEDULED = 'n'
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def encode_feed_cursor(row):
+    # Matches without a kickoff are paged by id alone
+    micros = '' if row['kickoff'] is None else (row['kickoff'] - EPOCH) // timedelta(microseconds=1)
+    return f"{row['segment']}.{micros}.{row['id']}"
 
+
+def decode_feed_cursor(value):
+    """Return (segment, kickoff, id) from an ?after= value, or None."""
     try:
-        home_last_matches = data.get('home_team_last_matches')
-        away_last_matches = data.get('away_team_last_matches')
-        start_time = data.get('start_time')
-        league_name = data.get('league_name')
-    except Exception as err:
-        print(err)
-        messages.error(request, "fail to get data")
-        return render("base:feed")
-        
-    context = {
-        'home' : home_last_matches['team_name'].strip(),
-        'away' : away_last_matches['team_name'].strip(),
-        'home_last_matches': home_last_matches['matches'],
-        'away_last_matches': away_last_matches['matches'],
-        'start_time': start_time,
-        'league_name' : league_name,
-        'match_id' : game_details.match_id
-    }
-    return render(request, 'base/last_matches.html', context)
-    
+        segment, micros, pk = value.split('.')
+        if segment == UNSCHEDULED:
+            return segment, None, int(pk)
+        if segment not in (UPCOMING, STARTED):
+            return None
+        return segment, EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
 
 
-def h2h(request, match_id):
-    game_details = MatchData.objects.get(match_id=match_id)
+# Create your views here.
+# The views are async: under ASGI a request waiting on an insight doesn't
+# take a slot of a fixed worker pool, so it never queues other requests.
+# It does keep the idle thread Django runs its ORM calls on until it
+# finishes. Sync ORM calls raise in here, go through the async ORM
+# methods (aget, afirst, async for) instead.
+@cache_per_ingestion(timeout=settings.FEED_CACHE_TIMEOUT)
+async def feed(request):
+    now = timezone.now()
+
+    # Only the columns the cards show, straight into dicts
+    fixtures = Fixture.objects.values(
+        'id', 'match_id', 'league_name', 'start_time', 'kickoff',
+        home_name=F('home__name'), away_name=F('away__name'),
+    ).order_by('kickoff', 'id')
+
+    # Upcoming matches first, soonest kickoff at the top, then the ones
+    # already under way, then those without a kickoff. Each segment is
+    # paged with a (kickoff, id) keyset cursor so a page costs the same no
+    # matter how deep it is.
+    segments = [
+        (UPCOMING, fixtures.filter(kickoff__gte=now)),
+        (STARTED, fixtures.filter(kickoff__lt=now)),
+        (UNSCHEDULED, fixtures.filter(kickoff__isnull=True)),
+    ]
+    cursor = decode_feed_cursor(request.GET.get('after'))
+    if cursor is not None:
+        segment, kickoff, pk = cursor
+        segments = segments[[name for name, _ in segments].index(segment):]
+        name, queryset = segments[0]
+        if kickoff is None:
+            after = Q(id__gt=pk)
+        else:
+            after = Q(kickoff__gt=kickoff) | Q(kickoff=kickoff, id__gt=pk)
+        segments[0] = (name, queryset.filter(after))
 
-    data = game_details.data or {}
+    # One extra row tells us whether there is a next page
+    matches = []
+    for name, queryset in segments:
+        rows = [row async for row in queryset[:FEED_PAGE_SIZE + 1 - len(matches)]]
+        for row in rows:
+            row['segment'] = name
+        matches += rows
+        if len(matches) > FEED_PAGE_SIZE:
+            break
 
-    try:
-        home_last_matches = data.get('home_team_last_matches')
-        away_last_matches = data.get('away_team_last_matches')
-        head_to_head = data.get('team_head_to_head')
-        start_time = data.get('start_time')
-        league_name = data.get('league_name')
-    except Exception as err:
-        print(err)
-        messages.error('failed to get match data')
-        return redirect("base:feed")
+    next_cursor = None
+    if len(matches) > FEED_PAGE_SIZE:
+        matches = matches[:FEED_PAGE_SIZE]
+        next_cursor = encode_feed_cursor(matches[-1])
 
-    context = {
-        'home' : home_last_matches['team_name'],
-        'away' : away_last_matches['team_name'],
-        'start_time': start_time,
-        'league_name' : league_name,
-        'match_id' : game_details.match_id,
-        'head_to_head' : head_to_head
+    return render(request, "base/feed.html", {"matches": matches, "next_cursor": next_cursor})
+
+
+
+def with_match_validators(view):
+    """Load the validators of a match page before `condition` asks for them.
+
+    Django's condition decorator calls its etag and last-modified functions
+    synchronously, even around async views, so they can't query the
+    database themselves.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, match_id):
+        request._match_validators = await MatchData.objects.filter(match_id=match_id).values(
+            'content_hash', 'created_at', 'league__content_hash', 'league__updated_at'
+        ).afirst() or {}
+        return await view(request, match_id)
+    return wrapper
+
+
+def match_validators(request, match_id):
+    """Content hashes and save times for a match page, see with_match_validators."""
+    return request._match_validators
+
+
+def match_etag(request, match_id):
+    row = match_validators(request, match_id)
+    if not row.get('content_hash'):
+        return None
+    # Standings come from the league row and change independently
+    return f"{row['content_hash'][:32]}-{(row['league__content_hash'] or '')[:16]}"
+
+
+def match_last_modified(request, match_id):
+    row = match_validators(request, match_id)
+    times = [row.get('created_at'), row.get('league__updated_at')]
+    return max((t for t in times if t is not None), default=None)
+
+
+async def get_fixture(match_id, *related):
+    fixtures = Fixture.objects.select_related('home', 'away', *related)
+    return await aget_object_or_404(fixtures, match_id=match_id)
+
+
+def fixture_context(fixture):
+    return {
+        'home' : fixture.home.name,
+        'away' : fixture.away.name,
+        'start_time': fixture.start_time,
+        'league_name' : fixture.league_name,
+        'match_id' : fixture.match_id,
     }
-    return render(request, 'base/head_to_head.html', context)
 
 
-def standings(request, match_id):
-    game_details = MatchData.objects.get(match_id=match_id)
+@with_match_validators
+@condition(etag_func=match_etag, last_modified_func=match_last_modified)
+@cache_per_ingestion()
+async def match_details(request, match_id):
+    fixture = await get_fixture(match_id)
 
-    data = game_details.data or {}
+    home_last_matches = []
+    away_last_matches = []
+    async for result in fixture.team_results.all():
+        if result.side == TeamResult.HOME:
+            home_last_matches.append(result)
+        else:
+            away_last_matches.append(result)
+    forms = {form.side: form async for form in fixture.forms.all()}
 
-    try:
-        home_last_matches = data.get('home_team_last_matches')
-        away_last_matches = data.get('away_team_last_matches')
-        standings = data.get('team_standings')
-        start_time = data.get('start_time')
-        league_name = data.get('league_name')
-    except Exception as err:
-        print(err)
-        messages.error('failed to get match data')
-        return redirect("base:feed")
+    context = {
+        **fixture_context(fixture),
+        'home_last_matches': home_last_matches,
+        'away_last_matches': away_last_matches,
+        'home_form': forms.get(TeamResult.HOME),
+        'away_form': forms.get(TeamResult.AWAY),
+    }
+    return render(request, 'base/last_matches.html', context)
     
-    new_standings = []
 
-    for s in standings:
-        tmp = int(s['w']) + int(s['d']) + int(s['l'])
-        s['tmp'] = tmp
-        new_standings.append(s)
+
+@with_match_validators
+@condition(etag_func=match_etag, last_modified_func=match_last_modified)
+@cache_per_ingestion()
+async def h2h(request, match_id):
+    fixture = await get_fixture(match_id)
 
     context = {
-        'home' : home_last_matches['team_name'].strip(),
-        'away' : away_last_matches['team_name'].strip(),
-        'start_time': start_time,
-        'league_name' : league_name,
-        'match_id' : game_details.match_id,
-        'standings' : new_standings
+        **fixture_context(fixture),
+        'head_to_head' : [result async for result in fixture.h2h_results.all()],
     }
+    return render(request, 'base/head_to_head.html', context)
 
-    return render(request, 'base/standings.html', context)
 
+@with_match_validators
+@condition(etag_func=match_etag, last_modified_func=match_last_modified)
+@cache_per_ingestion()
+async def standings(request, match_id):
+    fixture = await get_fixture(match_id, 'league')
 
-def ai_insight(request, match_id):
-    game_details = MatchData.objects.get(match_id=match_id)
+    if fixture.league is not None:
+        standings = fixture.league.standings
+    else:
+        # This match came with its own table, read just that key of the blob
+        standings = await MatchData.objects.filter(pk=fixture.match_data_id).values_list(
+            'data__team_standings', flat=True
+        ).afirst() or []
 
-    data = game_details.data or {}
+    context = {
+        **fixture_context(fixture),
+        'standings' : standings
+    }
 
-    try:
-        home_last_matches = data.get('home_team_last_matches')
-        away_last_matches = data.get('away_team_last_matches')
-        start_time = data.get('start_time')
-        league_name = data.get('league_name')
-    except Exception as err:
-        print(err)
-        messages.error(request, 'failed to get data')
-        return redirect("base/feed.html")
-    
-    try:
-        ai_insight = data.get('ai_insight')
-        if ai_insight is None:
-            print('AI insight not found in DB, fetching...')
-            ai_insight = generate_prediction(data)
-            data['ai_insight'] = ai_insight
-
-            MatchData.objects.update_or_create(
-                match_id=match_id,
-                defaults={
-                    'data': data,
-                    'created_at': game_details.created_at
-                }
-            )
-            print('AI insight saved to DB')
-        else:
-            print('Found ai_insight in DB, skipping Gemini API call.')
+    return render(request, 'base/standings.html', context)
 
-    except Exception as e:
-        messages.error(request, 'failed to get match data')
-        print(f"Error getting AI insight: {e}")
-        return redirect('base:feed')
 
-    # print(ai_insight)
-    
+async def wait_for_insight(match_id, fingerprint):
+    """Wait up to INSIGHT_WAIT_SECONDS for a queued insight, None if it isn't ready."""
+    # The worker puts the text in the cache once it is stored. The checks
+    # stay off the database, which the worker is writing to, and run on
+    # the shared executor rather than the request's own thread.
+    get_ready = sync_to_async(cache.get, thread_sensitive=False)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.INSIGHT_WAIT_SECONDS
+    while loop.time() < deadline:
+        await asyncio.sleep(INSIGHT_WAIT_INTERVAL)
+        text = await get_ready(ready_key(match_id, fingerprint))
+        if text is not None:
+            return text
+    return None
+
+
+@cache_per_ingestion()
+async def ai_insight(request, match_id):
+    fixture = await get_fixture(match_id)
+    fingerprint = await MatchData.objects.filter(pk=fixture.match_data_id).values_list(
+        'insight_fingerprint', flat=True
+    ).afirst()
+
+    # Insights are generated by the django-q cluster, never in the request
+    ai_insight = await MatchInsight.objects.filter(
+        match_id=match_id, fingerprint=fingerprint,
+    ).values_list('text', flat=True).afirst()
+    if ai_insight is None:
+        await sync_to_async(enqueue_insight)(match_id)
+        # Under ASGI a waiting request costs no thread, so it can hold on
+        # for the worker instead of sending the polling page straight away
+        ai_insight = await wait_for_insight(match_id, fingerprint)
+
+    # The baseline is computed at ingestion, older rows get it on the fly
+    stats = fixture.stats
+    if not stats:
+        from base.utils.stats import match_stats
+        game_details = await MatchData.objects.select_related('league').aget(pk=fixture.match_data_id)
+        standings = await sync_to_async(game_details.get_standings)()
+        stats = match_stats({**game_details.data, 'team_standings': standings})
+
     context = {
-        'home' : home_last_matches['team_name'].strip(),
-        'away' : away_last_matches['team_name'].strip(),
-        'start_time': start_time,
-        'league_name' : league_name,
-        'match_id' : game_details.match_id,
-        'ai_insight' : ai_insight
+        **fixture_context(fixture),
+        'ai_insight' : ai_insight,
+        'stats' : stats,
+        'poll_seconds': settings.INSIGHT_POLL_SECONDS,
     }
-    return render(request, 'base/ai.html', context)
\ No newline at end of file
+    response = render(request, 'base/ai.html', context)
+    if ai_insight is None:
+        # The pending page polls until the insight is there, don't cache it
+        response['Cache-Control'] = 'no-store'
+    return response
@@ -3,6 +3,14 @@ ASGI config for winkick project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The base views are async, so under an ASGI server (e.g. uvicorn or daphne)
+a request waiting on an AI insight doesn't occupy one of a fixed number of
+workers and never makes other requests queue behind it. It isn't free
+either: Django gives every request that has touched the ORM an idle thread
+of its own until it finishes, so many waiting requests mean many threads.
+Raise INSIGHT_WAIT_SECONDS when deploying this way, and see
+`manage.py bench_asgi` for how it compares with the WSGI entry point.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -38,9 +39,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django_q',
 ]
 
 MIDDLEWARE = [
+    'base.middleware.RequestTimingMiddleware',  # first, so it times everything below
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,7 +57,8 @@ ROOT_URLCONF = 'winkick.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to RequestTimingMiddleware
+        'BACKEND': 'base.timing.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -81,6 +85,77 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Pages are cached per ingestion (see base.cache), so the backend has to be
+# shared by the web workers and the save_matches_data command. Set REDIS_URL
+# to use Redis, otherwise a file based cache next to the project is used.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / '.django_cache',
+            # Four cached pages per match plus the feed, the default 300
+            # would cull pages of today's matches
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+PAGE_CACHE_TIMEOUT = 24 * 3600  # match pages, until the next ingestion at most
+FEED_CACHE_TIMEOUT = 60  # the feed also moves matches along as they kick off
+
+
+# Background tasks
+# https://django-q2.readthedocs.io/en/master/configure.html
+# AI insights are generated by the cluster (python manage.py qcluster), the
+# queue lives in the database so no extra broker is needed.
+
+Q_CLUSTER = {
+    'name': 'winkick',
+    'orm': 'default',
+    'workers': 2,
+    'timeout': 120,  # seconds, one Gemini call
+    'retry': 960,  # must be longer than the longest task, see INSIGHT_BATCH_TIMEOUT
+    'max_attempts': 3,
+    'catch_up': False,
+}
+
+INSIGHT_PENDING_TIMEOUT = 300  # a queued insight is queued again after this
+INSIGHT_POLL_SECONDS = 5  # the pending AI tab reloads itself this often
+INSIGHT_BATCH_TIMEOUT = 900  # seconds for pregenerating a whole matchday
+# Under ASGI the AI tab waits this long for a queued insight before showing
+# the polling page. Keep it at 0 under WSGI, a waiting request holds a thread.
+INSIGHT_WAIT_SECONDS = 0
+
+# Gemini calls, see base.utils.insights.InsightEngine
+INSIGHTS = {
+    'MODEL': 'gemini-2.5-flash-lite',
+    'CONCURRENCY': 8,  # requests in flight
+    'RETRIES': 5,  # extra attempts on 429 and 5xx
+    'BACKOFF_BASE': 2,
+    'BACKOFF_MAX': 60,
+    # Insights are cached by a hash of model and prompt
+    'CACHE_MAX_AGE': 30 * 24 * 3600,  # entries unused for longer are evicted
+    'CACHE_MAX_ENTRIES': 5000,
+}
+
+
+# Request timing, see base.middleware.RequestTimingMiddleware
+REQUEST_TIMING = {
+    'SERVER_TIMING': True,  # send the Server-Timing header
+    'SLOW_REQUEST_MS': 500,  # requests slower than this are logged with their SQL
+    'MAX_LOGGED_QUERIES': 50,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -123,3 +198,36 @@ STATIC_ROOT = BASE_DIR / 'static'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+
+# Scraper
+# Limits are applied per host by base.utils.fetcher.FetchSession
+
+SCRAPER = {
+    'BASE_URL': 'https://www.livescore.bz',  # bench_scrape points this at a local stand-in
+    'MAX_CONCURRENCY_PER_HOST': 8,
+    'REQUESTS_PER_SECOND': 10,
+    'BURST': 10,
+    'TIMEOUT': 20,  # seconds, per request attempt
+    'RETRIES': 4,  # extra attempts on timeouts, 429 and 5xx
+    'BACKOFF_BASE': 0.5,
+    'BACKOFF_MAX': 30,
+    # Streaming pipeline, see base.utils.pipeline.run_pipeline
+    'FETCH_WORKERS': 16,  # matches being downloaded at once
+    'PARSE_WORKERS': 4,  # parser threads
+    'QUEUE_SIZE': 32,  # matches buffered between stages
+    'BATCH_SIZE': 25,  # matches per DB write
+    # Persistent HTTP cache, set HTTP_CACHE_DIR to None to disable it
+    'HTTP_CACHE_DIR': BASE_DIR / '.http_cache',
+    'HTTP_CACHE_MAX_AGE': 7 * 24 * 3600,  # entries unused for longer are pruned
+    # Seconds a cached page is served without revalidation, keyed by URL
+    # fragment. Endpoints not listed are always revalidated.
+    'HTTP_CACHE_TTLS': {
+        '/football/event/': 12 * 3600,
+        'h2h_2018.cache': 6 * 3600,
+        'last_matches_2018.cache': 3600,
+        'standings_2020.cache': 3600,
+    },
+    # Telemetry of the last save_matches_data run, see manage.py ingest_report
+    'REPORT_FILE': BASE_DIR / 'ingest_report.json',
+}
+